@@ -0,0 +1,71 @@
+import numpy as np
+
+from cache import cached_df
+from db import connection, rebuild_pair_stats, write_with_retry
+from relationships import ID_CHUNK, pair_positions
+
+
+class CoplayMatrix:
+    """How often each pair of a fixed set of dogs has played together.
+
+    Read from ``pair_stats``, the sparse per-pair table that triggers keep
+    current as groups are saved and deleted. ``plays[i, j]`` counts saved
+    groups that held the dogs at positions i and j; ``safe_plays`` and
+    ``intro_plays`` split those by the group's status.
+    """
+
+    def __init__(self, ids, plays, safe_plays, intro_plays):
+        self.ids = list(ids)
+        self.pos = {did: i for i, did in enumerate(self.ids)}
+        self.plays = plays
+        self.safe_plays = safe_plays
+        self.intro_plays = intro_plays
+
+    @classmethod
+    def load(cls, dog_ids):
+        ids = list(dict.fromkeys(int(d) for d in dog_ids))
+        n = len(ids)
+        counts = np.zeros((3, n, n), dtype=np.int32)
+        rows = []
+        if n > 1:
+            with connection() as conn:
+                for start in range(0, n, ID_CHUNK):
+                    chunk = ids[start:start + ID_CHUNK]
+                    rows.extend(conn.execute(
+                        "SELECT dog_a_id, dog_b_id, plays, safe_plays, intro_plays FROM pair_stats "
+                        "WHERE dog_a_id IN ({})".format(",".join("?" * len(chunk))),
+                        chunk,
+                    ).fetchall())
+        if rows:
+            pairs = np.array(rows, dtype=np.int64)
+            pa, pb, keep = pair_positions(ids, pairs[:, 0], pairs[:, 1])
+            vals = pairs[keep, 2:].T
+            counts[:, pa, pb] = vals
+            counts[:, pb, pa] = vals
+        return cls(ids, *counts)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self, a_id, b_id):
+        return int(self.plays[self.pos[a_id], self.pos[b_id]])
+
+
+def playmates(dog_id, limit=20):
+    """A dog's most frequent playmates: name, plays, safe_plays, intro_plays, last_date."""
+    return cached_df(
+        """
+        SELECT d.name, p.plays, p.safe_plays, p.intro_plays, p.last_date
+        FROM pair_stats p
+        JOIN dogs d ON d.id = CASE WHEN p.dog_a_id = ? THEN p.dog_b_id ELSE p.dog_a_id END
+        WHERE p.dog_a_id = ? OR p.dog_b_id = ?
+        ORDER BY p.plays DESC, p.last_date DESC, d.name
+        LIMIT ?
+        """,
+        (dog_id, dog_id, dog_id, limit),
+    )
+
+
+def rebuild():
+    """Recount every pair from saved history, e.g. after editing the tables by hand."""
+    write_with_retry(rebuild_pair_stats, tables=("pair_stats",))
@@ -0,0 +1,287 @@
+"""Local HTTP JSON API for grouping, relationships and attendance.
+
+    python api.py --port 8765 --workers 8
+
+Endpoints (request and response bodies are JSON):
+
+    GET  /health
+    POST /groups/suggest       {"dog_ids": [...], "rules": {...}, "target_size": 4,
+                                "mode": "greedy", "time_budget": 2.0, "prefer_familiar": false}
+    GET  /relationships?a=1&b=2
+    POST /relationships/bulk   {"pairs": [{"a": 1, "b": 2, "status": "friend"}, ...]}
+    POST /attendance           {"date": "2030-01-02", "slot": "9:00 AM - 10:00 AM", "dog_ids": [...]}
+
+The server is a single asyncio event loop; database and solver work runs on
+a bounded thread pool no larger than the connection pool, so every request
+reuses a pooled connection and a slow solve never stalls other clients.
+Connections are kept alive between requests. It binds to localhost by
+default and has no authentication, so do not expose it beyond the machine.
+Writes made here bump the stored versions of the tables they touch, so a
+running Streamlit app (or any other process using the same database)
+refreshes the affected cached reads within ``db.VERSION_POLL_INTERVAL``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+MAX_BODY = 1024 * 1024
+MAX_HEADER_LINES = 100
+IDLE_TIMEOUT = 30.0
+MAX_TIME_BUDGET = 10.0
+
+DEFAULT_RULES = {
+    "allow_unknown": True,
+    "separate_hard_shy": True,
+    "separate_intact": False,
+    "same_size_only": False,
+}
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _id_list(value, field):
+    if not isinstance(value, list):
+        raise HTTPError(400, f"{field} must be a list of dog IDs")
+    try:
+        return list(dict.fromkeys(int(v) for v in value))
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{field} must be a list of dog IDs") from None
+
+
+def _int_param(query, name):
+    try:
+        return int(query[name][0])
+    except (KeyError, ValueError):
+        raise HTTPError(400, f"query parameter {name!r} must be a dog ID") from None
+
+
+def build_routes():
+    """Map (method, path) to a blocking handler(query, body) that returns a JSON-able dict."""
+    from db import pool_stats, table_versions
+    from grouping import SOLVER_MODES, load_attrs, save_attendance, suggest_groups
+    from relationships import get_relationship, upsert_relationships
+    from slots import slot_key
+
+    def health(query, body):
+        return {"status": "ok", "pool": pool_stats(), "versions": dict(zip(
+            ("dogs", "relationships", "attendance", "groups"),
+            table_versions(("dogs", "relationships", "attendance", "groups")),
+        ))}
+
+    def suggest(query, body):
+        dog_ids = _id_list(body.get("dog_ids"), "dog_ids")
+        rules = dict(DEFAULT_RULES)
+        for key, value in (body.get("rules") or {}).items():
+            if key not in rules:
+                raise HTTPError(400, f"unknown rule {key!r}")
+            rules[key] = bool(value)
+        mode = body.get("mode", "greedy")
+        if mode not in SOLVER_MODES:
+            raise HTTPError(400, f"mode must be one of {', '.join(SOLVER_MODES)}")
+        try:
+            target_size = int(body.get("target_size", 4))
+            time_budget = min(float(body.get("time_budget", 2.0)), MAX_TIME_BUDGET)
+        except (TypeError, ValueError):
+            raise HTTPError(400, "target_size and time_budget must be numbers") from None
+        if target_size < 2:
+            raise HTTPError(400, "target_size must be at least 2")
+        missing = sorted(set(dog_ids) - set(load_attrs(dog_ids)))
+        if missing:
+            raise HTTPError(404, f"unknown dog ID(s): {missing}")
+        start = time.perf_counter()
+        groups, leftovers = suggest_groups(
+            dog_ids, rules, target_size, mode=mode, time_budget=time_budget,
+            prefer_familiar=bool(body.get("prefer_familiar", False)),
+        )
+        return {
+            "groups": groups, "leftovers": leftovers, "rules": rules, "mode": mode,
+            "solve_seconds": round(time.perf_counter() - start, 4),
+        }
+
+    def relationship(query, body):
+        a, b = _int_param(query, "a"), _int_param(query, "b")
+        return {"a": a, "b": b, "status": get_relationship(a, b)}
+
+    def relationships_bulk(query, body):
+        pairs = body.get("pairs")
+        if not isinstance(pairs, list):
+            raise HTTPError(400, "pairs must be a list of {a, b, status} objects")
+        try:
+            rows = [(p["a"], p["b"], p["status"]) for p in pairs]
+            written = upsert_relationships(rows)
+        except (KeyError, TypeError):
+            raise HTTPError(400, "pairs must be a list of {a, b, status} objects") from None
+        except ValueError as exc:
+            raise HTTPError(400, str(exc)) from None
+        return {"written": written}
+
+    def attendance(query, body):
+        day, slot = body.get("date"), body.get("slot")
+        if not isinstance(day, str) or not isinstance(slot, str) or not slot.strip():
+            raise HTTPError(400, "date and slot are required strings")
+        try:
+            # stored as YYYY-MM-DD, like the dates the app writes
+            day = date.fromisoformat(day).isoformat()
+        except ValueError:
+            raise HTTPError(400, "date must be an ISO date (YYYY-MM-DD)") from None
+        dog_ids = _id_list(body.get("dog_ids"), "dog_ids")
+        label = slot_key(slot)[0]
+        save_attendance(day, label, dog_ids)
+        return {"date": day, "slot": label, "recorded": len(dog_ids)}
+
+    return {
+        ("GET", "/health"): health,
+        ("POST", "/groups/suggest"): suggest,
+        ("GET", "/relationships"): relationship,
+        ("POST", "/relationships/bulk"): relationships_bulk,
+        ("POST", "/attendance"): attendance,
+    }
+
+
+class Server:
+    def __init__(self, routes, workers):
+        self.routes = routes
+        self.paths = {path for _, path in routes}
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as exc:
+                    await self.respond(writer, exc.status, {"error": exc.message}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, raw = request
+                status, payload = await self.dispatch(method, target, raw)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line") from None
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(400, "too many headers")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length") from None
+        if length < 0:
+            raise HTTPError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, f"body larger than {MAX_BODY} bytes")
+        raw = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, raw
+
+    async def dispatch(self, method, target, raw):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if url.path in self.paths:
+                return 405, {"error": f"{method} not allowed on {url.path}"}
+            return 404, {"error": f"no route for {url.path}"}
+        try:
+            body = json.loads(raw) if raw else {}
+            if not isinstance(body, dict):
+                raise HTTPError(400, "request body must be a JSON object")
+            query = parse_qs(url.query)
+            loop = asyncio.get_running_loop()
+            return 200, await loop.run_in_executor(self.executor, handler, query, body)
+        except json.JSONDecodeError as exc:
+            return 400, {"error": f"invalid JSON: {exc}"}
+        except UnicodeDecodeError:
+            return 400, {"error": "request body must be UTF-8"}
+        except HTTPError as exc:
+            return exc.status, {"error": exc.message}
+        except sqlite3.IntegrityError as exc:
+            return 400, {"error": str(exc)}
+        except Exception as exc:
+            print(f"{method} {url.path} failed: {exc!r}", file=sys.stderr)
+            return 500, {"error": "internal error"}
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host, port, workers, ready=None):
+    server = Server(build_routes(), workers)
+    listener = await asyncio.start_server(server.handle, host, port, backlog=1024)
+    bound = listener.sockets[0].getsockname()
+    print(f"Serving on http://{bound[0]}:{bound[1]} with {workers} worker thread(s)", flush=True)
+    if ready is not None:
+        ready(bound[1])
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the grouping engine as a local JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", help="data directory holding dogs.db (default: the app's)")
+    parser.add_argument("--workers", type=int, help="blocking-work threads (default: the db pool size)")
+    args = parser.parse_args(argv)
+    if args.data_dir:
+        os.environ["DOG_PLAYGROUPS_DATA_DIR"] = args.data_dir
+    # config resolves the data directory on import, so the engine comes in after parsing
+    from db import POOL_SIZE, init_db
+
+    init_db()
+    workers = max(1, min(args.workers or POOL_SIZE, POOL_SIZE))
+    try:
+        asyncio.run(serve(args.host, args.port, workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
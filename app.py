@@ -1,3 +1,4 @@
+import importlib
 import os
 import sys
 
@@ -6,24 +7,47 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 import streamlit as st
 
-from db import init_db
-from app_pages.dogs import page_dogs
-from app_pages.history import page_history
-from app_pages.relationships import page_relationships
-from app_pages.today import page_today
+import perf
+import startup
+from cache import cache_stats
+from db import init_db, pool_stats
+from app_pages.performance import sidebar_performance
+
+# sidebar label -> (module, render function); a page's module, and whatever it
+# pulls in, is imported the first time that page is picked
+PAGES = {
+    "Dogs": ("app_pages.dogs", "page_dogs"),
+    "Relationships": ("app_pages.relationships", "page_relationships"),
+    "Today": ("app_pages.today", "page_today"),
+    "History": ("app_pages.history", "page_history"),
+}
+
+def load_page(label):
+    module_name, func_name = PAGES[label]
+    with perf.span(f"import {module_name}"):
+        module = importlib.import_module(module_name)
+    return getattr(module, func_name)
 
 def main():
     st.set_page_config(page_title="Dog Playgroups", page_icon="🐶", layout="wide")
     init_db()
-    page = st.sidebar.radio("Pages", ["Dogs", "Relationships", "Today", "History"])
-    if page == "Dogs":
-        page_dogs()
-    elif page == "Relationships":
-        page_relationships()
-    elif page == "Today":
-        page_today()
-    else:
-        page_history()
+    page = st.sidebar.radio("Pages", list(PAGES))
+    with perf.trace(page, profile=st.session_state.pop("perf_profile", False)):
+        load_page(page)()
+
+    with st.sidebar.expander("Data cache"):
+        stats = cache_stats()
+        st.caption(
+            f"{stats['hits']:,} hits, {stats['misses']:,} misses ({stats['hit_rate']:.0%} hit rate), "
+            f"{stats['entries']} cached queries, {stats['evictions']:,} evicted."
+        )
+        pool = pool_stats()
+        st.caption(
+            f"Connections: {pool['in_use']} in use, {pool['idle']} idle, {pool['opens']} opened, "
+            f"{pool['waits']} checkouts waited."
+        )
+    sidebar_performance()
+    startup.first_render()
 
 if __name__ == "__main__":
     main()
@@ -1,47 +1,83 @@
+from datetime import date
 from pathlib import Path
 
 import streamlit as st
 
 from config import DATA_DIR
-from db import fetch_df, get_conn
+from db import transaction
+from history import (
+    DAYS_PER_PAGE,
+    TIMES_OF_DAY,
+    day_slots,
+    day_summaries,
+    history_bounds,
+    slot_groups,
+)
 
 def page_history():
     st.header("Saved Groups (History)")
-    dates = fetch_df("SELECT DISTINCT date FROM groups ORDER BY date DESC")
-    if dates.empty:
+    bounds = history_bounds()
+    if bounds is None:
         st.info("No saved groups yet.")
         return
-    sel_date = st.selectbox("Date", dates["date"].tolist())
-    slots = fetch_df("SELECT DISTINCT slot FROM groups WHERE date=? ORDER BY slot", (sel_date,))
-    sel_slot = st.selectbox("Slot", slots["slot"].tolist())
 
-    groups_df = fetch_df(
-        "SELECT group_name, notes FROM groups WHERE date=? AND slot=? ORDER BY group_name",
-        (sel_date, sel_slot),
-    )
-    members_df = fetch_df(
-        """
-        SELECT g.group_name, d.name
-        FROM group_members gm
-        JOIN dogs d ON d.id = gm.dog_id
-        JOIN groups g ON g.date=gm.date AND g.slot=gm.slot AND g.group_name=gm.group_name
-        WHERE gm.date=? AND gm.slot=?
-        ORDER BY g.group_name, d.name
-    """,
-        (sel_date, sel_slot),
+    fc = st.columns(3)
+    first, last = (date.fromisoformat(d) for d in bounds)
+    date_from = fc[0].date_input("From", value=first, min_value=first, max_value=last)
+    date_to = fc[1].date_input("To", value=last, min_value=first, max_value=last)
+    time_range = TIMES_OF_DAY[fc[2].selectbox("Time of day", list(TIMES_OF_DAY))]
+    date_from, date_to = date_from.isoformat(), date_to.isoformat()
+
+    # cursors of the pages before this one; reset when the filters change
+    filters = (date_from, date_to, time_range)
+    if st.session_state.get("history_filters") != filters:
+        st.session_state["history_filters"] = filters
+        st.session_state["history_cursors"] = []
+    cursors = st.session_state["history_cursors"]
+    before = cursors[-1] if cursors else None
+    # one extra day tells whether there is an older page
+    summaries = day_summaries(date_from, date_to, time_range, before=before, limit=DAYS_PER_PAGE + 1)
+    if summaries.empty:
+        st.info("No saved groups in this range.")
+        return
+    has_older = len(summaries) > DAYS_PER_PAGE
+    summaries = summaries.head(DAYS_PER_PAGE)
+
+    nc = st.columns([1, 1, 4])
+    if nc[0].button("Newer", disabled=not cursors):
+        cursors.pop()
+        st.rerun()
+    if nc[1].button("Older", disabled=not has_older):
+        cursors.append(summaries["date"].iloc[-1])
+        st.rerun()
+    nc[2].caption(f"Page {len(cursors) + 1}: {summaries['date'].iloc[-1]} to {summaries['date'].iloc[0]}")
+    st.dataframe(
+        summaries.rename(columns={
+            "date": "Date", "slots": "Slots", "groups": "Groups", "dogs": "Dogs",
+            "needs_intro_share": "Needs Intro share",
+        }),
+        hide_index=True,
+        use_container_width=True,
     )
 
-    for gname in groups_df["group_name"].tolist():
-        note = groups_df.loc[groups_df["group_name"] == gname, "notes"].values[0]
-        names = members_df.loc[members_df["group_name"] == gname, "name"].tolist()
-        st.write(f"**{gname}** — {note or 'Saved'}")
+    sel_date = st.selectbox("Date", summaries["date"].tolist())
+    slots = day_slots(sel_date, time_range)
+    labels = dict(zip(slots["id"], slots["label"]))
+    slot_id = int(st.selectbox("Slot", list(labels), format_func=labels.get))
+    sel_slot = labels[slot_id]
+
+    groups_df = slot_groups(slot_id)
+    for gname, rows in groups_df.groupby("group_name", sort=False):
+        names = rows["name"].dropna().tolist()
+        st.write(f"**{gname}** — {rows['notes'].iloc[0] or 'Saved'}")
         st.write(", ".join(names) if names else "_(empty)_")
         st.markdown("---")
+    group_names = groups_df["group_name"].unique().tolist()
 
     st.subheader("Delete specific groups")
     st.caption("Select groups to remove from this date/slot. Attendance remains unchanged.")
     del_keys = []
-    for i, gname in enumerate(groups_df["group_name"].tolist(), start=1):
+    for i, gname in enumerate(group_names, start=1):
         key = f"del_grp_{sel_date}_{sel_slot}_{i}"
         del_keys.append((key, gname))
         st.checkbox(f"Delete {gname}", key=key, value=False)
@@ -54,24 +90,18 @@ def page_history():
         if not to_delete:
             st.warning("Select at least one group to delete.")
         else:
-            conn = get_conn()
-            cur = conn.cursor()
-            for gname in to_delete:
-                cur.execute(
-                    "DELETE FROM group_members WHERE date=? AND slot=? AND group_name=?",
-                    (sel_date, sel_slot, gname),
-                )
-                cur.execute(
-                    "DELETE FROM groups WHERE date=? AND slot=? AND group_name=?",
-                    (sel_date, sel_slot, gname),
-                )
-            conn.commit()
+            with transaction("groups") as conn:
+                for gname in to_delete:
+                    conn.execute(
+                        "DELETE FROM group_members WHERE slot_id=? AND group_name=?", (slot_id, gname)
+                    )
+                    conn.execute("DELETE FROM groups WHERE slot_id=? AND group_name=?", (slot_id, gname))
             st.success(f"Deleted {len(to_delete)} group(s) from {sel_date} / {sel_slot}.")
             st.rerun()
 
     if st.button("Export CSV"):
         out = Path(DATA_DIR) / f"groups_{sel_date}_{sel_slot}.csv"
-        members_df.to_csv(out, index=False)
+        groups_df.dropna(subset=["name"])[["group_name", "name"]].to_csv(out, index=False)
         st.success(f"Exported to {out}")
 
     st.subheader("Danger zone")
@@ -80,11 +110,8 @@ def page_history():
     )
     confirm = st.checkbox("I understand and want to delete this date/slot.")
     if st.button("Delete selected date/slot", disabled=not confirm):
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM group_members WHERE date=? AND slot=?", (sel_date, sel_slot))
-        cur.execute("DELETE FROM groups WHERE date=? AND slot=?", (sel_date, sel_slot))
-        cur.execute("DELETE FROM attendance WHERE date=? AND slot=?", (sel_date, sel_slot))
-        conn.commit()
+        with transaction("slots") as conn:
+            # attendance, groups and members go with the slot row (ON DELETE CASCADE)
+            conn.execute("DELETE FROM slots WHERE id=?", (slot_id,))
         st.success(f"Deleted history for {sel_date} / {sel_slot}.")
         st.rerun()
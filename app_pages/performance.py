@@ -0,0 +1,57 @@
+import os
+
+import streamlit as st
+
+import perf
+
+# the panel is for whoever runs the app, not for front-desk staff
+ADMIN = os.environ.get("DOG_PLAYGROUPS_ADMIN") == "1"
+
+
+def sidebar_performance():
+    """Admin-only sidebar panel: recent reruns, their span breakdown and profiles."""
+    if not ADMIN:
+        return
+    import pandas as pd
+
+    with st.sidebar.expander("Performance"):
+        on = st.toggle("Record timings", perf.enabled(), help="Applies to every session of this app.")
+        if on != perf.enabled():
+            perf.enable(on)
+            st.rerun()
+        if not on:
+            st.caption("Timing is off; it costs next to nothing while off.")
+            return
+        if st.button("Profile next rerun"):
+            st.session_state["perf_profile"] = True
+            st.rerun()
+
+        traces = perf.recent()
+        if not traces:
+            st.caption("No reruns recorded yet.")
+            return
+        st.dataframe(
+            pd.DataFrame([
+                {"page": t.label, "ms": round(t.seconds * 1000, 1), "queries": t.queries,
+                 "rows": t.rows, "statements": t.statements}
+                for t in traces
+            ]),
+            hide_index=True,
+            use_container_width=True,
+        )
+        idx = st.selectbox(
+            "Breakdown of", range(len(traces)),
+            format_func=lambda i: f"{traces[i].label} at {traces[i].as_dict()['started'][11:]}",
+        )
+        record = traces[idx].as_dict()
+        st.dataframe(
+            pd.DataFrame([{"span": name, **s} for name, s in record["spans"].items()]),
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.caption(
+            f"{record['ms']:.1f} ms, {record['checkouts']} connection checkout(s). "
+            f"Logged to {perf.LOG_FILE}."
+        )
+        if traces[idx].profile:
+            st.code(traces[idx].profile, language=None)
@@ -1,19 +1,20 @@
 import html
-from itertools import combinations
 
 import pandas as pd
 import streamlit as st
 
-from db import fetch_df
-from relationships import get_relationship, upsert_relationship
+from cache import cached, cached_df
+from importers import RELATIONSHIP_COLUMNS, import_relationships, normalize_columns
+from relationships import get_relationship, get_unknown_pairs, upsert_relationship
+from roster import get_roster
 
 def page_relationships():
     st.header("Relationships")
-    dogs = fetch_df("SELECT id, name FROM dogs ORDER BY name")
-    if dogs.empty:
+    roster = get_roster()
+    if not len(roster):
         st.info("Add dogs first.")
         return
-    name_by_id = dict(dogs.values)
+    name_by_id = roster.names
 
     c1, c2, c3 = st.columns([2, 2, 2])
     dog_ids = list(name_by_id.keys())
@@ -26,7 +27,7 @@ def page_relationships():
         "Dog B", options=dog_ids, index=b_default_index, format_func=lambda i: name_by_id[i]
     )
 
-    current_status = get_relationship(a, b)
+    current_status = cached(("relationship", a, b), ("relationships",), lambda: get_relationship(a, b))
     status_options = ["friend", "foe", "unknown"]
     status_index = status_options.index(current_status) if current_status in status_options else 2
     status = c3.radio("Status", status_options, index=status_index, horizontal=True)
@@ -49,12 +50,19 @@ def page_relationships():
     )
 
     raw_pairs = []
+    first_idx = 1
     if status_view == "unknown":
-        for i, j in combinations(dog_ids, 2):
-            if get_relationship(i, j) == "unknown":
-                raw_pairs.append((name_by_id[i], name_by_id[j]))
+        unknown_pairs = get_unknown_pairs(dog_ids)
+        page_size = 100
+        page_count = max(1, -(-unknown_pairs.total // page_size))
+        pc1, pc2 = st.columns([1, 3])
+        page_no = pc1.number_input("Page", 1, page_count, 1, key="unknown_pairs_page")
+        pc2.caption(f"{unknown_pairs.total:,} unknown pair(s), {page_size} per page, {page_count:,} page(s).")
+        first_idx = (page_no - 1) * page_size + 1
+        for i, j in unknown_pairs.page(first_idx - 1, page_size):
+            raw_pairs.append((name_by_id[i], name_by_id[j]))
     else:
-        rel_df = fetch_df(
+        rel_df = cached_df(
             "SELECT dog_a_id, dog_b_id FROM relationships WHERE status=? ORDER BY id",
             (status_view,),
         )
@@ -79,14 +87,14 @@ def page_relationships():
         if len(pairs) > 10:
             items = "<br>".join(
                 f"{idx}. {html.escape(name_a)} ↔ {html.escape(name_b)}"
-                for idx, (name_a, name_b) in enumerate(pairs, start=1)
+                for idx, (name_a, name_b) in enumerate(pairs, start=first_idx)
             )
             st.markdown(
                 f"<div style='max-height: 300px; overflow-y: auto; padding-right: 8px;'>{items}</div>",
                 unsafe_allow_html=True,
             )
         else:
-            for idx, (name_a, name_b) in enumerate(pairs, start=1):
+            for idx, (name_a, name_b) in enumerate(pairs, start=first_idx):
                 st.write(f"{idx}. {name_a} ↔ {name_b}")
 
     st.subheader("Import relationships from CSV")
@@ -96,97 +104,40 @@ def page_relationships():
     csv_file = st.file_uploader("Upload relationships CSV", type=["csv"], key="rel_csv_upload")
     if csv_file is not None:
         try:
-            csv_df = pd.read_csv(csv_file)
+            csv_df = normalize_columns(pd.read_csv(csv_file, nrows=20))
         except Exception as exc:
             st.error(f"Failed to read CSV: {exc}")
             csv_df = None
 
         if csv_df is not None and not csv_df.empty:
-            renamed = {
-                c: c.strip().lower().replace(" ", "_") for c in csv_df.columns
-            }
-            csv_df = csv_df.rename(columns=renamed)
-            required = {"dog_a", "dog_b", "status"}
+            required = set(RELATIONSHIP_COLUMNS)
             if not required.issubset(csv_df.columns):
                 missing = ", ".join(sorted(required - set(csv_df.columns)))
                 st.error(f"CSV missing required column(s): {missing}")
             else:
-                preview = csv_df[list(required)].copy()
-                st.dataframe(preview.head(20), use_container_width=True)
-
-                id_by_name = {name.lower(): did for did, name in name_by_id.items()}
-
-                def normalize_status(value: str):
-                    if pd.isna(value):
-                        return None
-                    s = str(value).strip().lower()
-                    mapping = {
-                        "friend": "friend",
-                        "friends": "friend",
-                        "foe": "foe",
-                        "enemy": "foe",
-                        "unknown": "unknown",
-                        "unsure": "unknown",
-                    }
-                    return mapping.get(s)
+                st.dataframe(csv_df[list(RELATIONSHIP_COLUMNS)], use_container_width=True)
 
                 if st.button("Import relationships", key="import_rel_csv_btn"):
-                    created = changed = unchanged = skipped = 0
-                    errors = []
-                    existing_rel = fetch_df(
-                        "SELECT dog_a_id, dog_b_id, status FROM relationships"
-                    )
-                    existing_map = {
-                        tuple(sorted((int(row["dog_a_id"]), int(row["dog_b_id"])))): row["status"]
-                        for _, row in existing_rel.iterrows()
-                    }
-                    for idx, row in csv_df.iterrows():
-                        name_a = str(row.get("dog_a", "")).strip()
-                        name_b = str(row.get("dog_b", "")).strip()
-                        status_val = normalize_status(row.get("status"))
-
-                        if not name_a or not name_b:
-                            skipped += 1
-                            errors.append(f"Row {idx+1}: missing dog name(s)")
-                            continue
-                        if name_a.lower() == name_b.lower():
-                            skipped += 1
-                            errors.append(f"Row {idx+1} ({name_a}): cannot relate dog to itself")
-                            continue
-                        if status_val is None:
-                            skipped += 1
-                            errors.append(
-                                f"Row {idx+1} ({name_a} ↔ {name_b}): invalid status '{row.get('status')}'"
-                            )
-                            continue
-
-                        ida = id_by_name.get(name_a.lower())
-                        idb = id_by_name.get(name_b.lower())
-                        if ida is None or idb is None:
-                            skipped += 1
-                            errors.append(
-                                f"Row {idx+1} ({name_a} ↔ {name_b}): dog not found in database"
-                            )
-                            continue
-
-                        key = tuple(sorted((ida, idb)))
-                        previous = existing_map.get(key)
-                        upsert_relationship(ida, idb, status_val)
-                        existing_map[key] = status_val
-                        if previous is None:
-                            created += 1
-                        elif previous == status_val:
-                            unchanged += 1
-                        else:
-                            changed += 1
+                    bar = st.progress(0.0, text="Importing…")
+
+                    def report(rows_done, elapsed):
+                        done = min(csv_file.tell() / max(csv_file.size, 1), 1.0)
+                        bar.progress(done, text=f"{rows_done:,} rows — {rows_done / max(elapsed, 1e-9):,.0f} rows/s")
+
+                    csv_file.seek(0)
+                    try:
+                        result = import_relationships(csv_file, progress=report)
+                    except ValueError as exc:
+                        st.error(str(exc))
+                        return
+                    bar.progress(1.0, text=f"{result['rows']:,} rows in {result['elapsed']:.1f}s")
 
                     summary = (
                         "Import complete — Created: {created}, Changed: {changed}, "
                         "Unchanged: {unchanged}, Skipped: {skipped}"
-                    ).format(
-                        created=created, changed=changed, unchanged=unchanged, skipped=skipped
-                    )
+                    ).format(**result)
                     st.success(summary)
+                    errors = result["errors"]
                     if errors:
                         with st.expander("Show import messages"):
                             for msg in errors[:200]:
@@ -1,14 +1,18 @@
+import os
 from datetime import date
 
 import streamlit as st
 
-from db import fetch_df
-from grouping import save_groups, suggest_groups
+from cache import cached_df
+from grouping import regroup, save_attendance, save_groups, save_groups_batch, suggest_groups
+from planner import plan_day
+from roster import get_roster
+from slots import format_slot, to_minutes
 
 def page_today():
     st.header("Today & Auto-Grouping")
-    dogs = fetch_df("SELECT id, name FROM dogs ORDER BY name")
-    if dogs.empty:
+    roster = get_roster()
+    if not len(roster):
         st.info("Add dogs first.")
         return
 
@@ -22,17 +26,23 @@ def page_today():
     end_hour = ec1.selectbox("End hour", list(range(1, 13)), index=11)
     end_minute = ec2.selectbox("End minute", [f"{m:02d}" for m in range(0, 60)], index=0)
     end_ampm = ec3.selectbox("End AM/PM", ["AM", "PM"], index=0)
-    slot = f"{start_hour}:{start_minute} {start_ampm} - {end_hour}:{end_minute} {end_ampm}"
+    slot = format_slot(
+        to_minutes(start_hour, start_minute, start_ampm), to_minutes(end_hour, end_minute, end_ampm)
+    )
     selected_date = (
         selected_date_obj.isoformat() if hasattr(selected_date_obj, "isoformat") else str(selected_date_obj)
     )
 
     selected = st.multiselect(
         "Who is here today?",
-        options=list(dogs["id"]),
-        format_func=lambda i: dogs.loc[dogs["id"] == i, "name"].values[0],
+        options=roster.ids,
+        format_func=roster.name,
     )
 
+    if st.button("Record attendance for this slot", disabled=len(selected) == 0):
+        save_attendance(selected_date, slot, selected)
+        st.success(f"Recorded {len(selected)} dog(s) for {slot}.")
+
     st.subheader("Rules")
     cc = st.columns(5)
     target_size = cc[0].slider("Max group size", 2, 8, 4)
@@ -46,26 +56,89 @@ def page_today():
         separate_intact=separate_intact,
         same_size_only=same_size_only,
     )
+    solver_modes = {
+        "Quick": "greedy",
+        "Best within time limit": "exact",
+        "Best of many tries": "multistart",
+        "From compatible cliques": "clique",
+    }
+    sc = st.columns([3, 2, 1, 1])
+    solver = sc[0].radio(
+        "Solver",
+        list(solver_modes),
+        index=0,
+        horizontal=True,
+        help="The slower solvers look for fewer leftovers and more friend pairs.",
+    )
+    mode = solver_modes[solver]
+    time_budget = sc[1].slider("Time limit (seconds)", 1, 20, 3, disabled=mode == "greedy")
+    workers = sc[2].number_input(
+        "Workers", 1, os.cpu_count() or 1, min(4, os.cpu_count() or 1), disabled=mode != "multistart"
+    )
+    seed = sc[3].number_input("Seed", 0, 10**6, 0, disabled=mode != "multistart")
+    prefer_familiar = st.checkbox(
+        "Prefer dogs who have played together before",
+        False,
+        help="Breaks ties between equally good choices using saved group history.",
+    )
+
+    previous = st.session_state.get("last_selection")
+    if (
+        "last_groups" in st.session_state
+        and previous is not None
+        and set(selected) != set(previous)
+        and st.session_state.get("last_date") == selected_date
+        and st.session_state.get("last_slot") == slot
+        and st.session_state.get("last_rules") == (rules, target_size)
+    ):
+        added = sorted(set(selected) - set(previous))
+        removed = sorted(set(previous) - set(selected))
+        groups, leftovers = regroup(
+            st.session_state["last_groups"],
+            st.session_state.get("last_leftovers", []),
+            added,
+            removed,
+            rules,
+            target_size,
+        )
+        for k in list(st.session_state.keys()):
+            if str(k).startswith("sel_grp_"):
+                del st.session_state[k]
+        st.session_state["last_groups"] = groups
+        st.session_state["last_leftovers"] = leftovers
+        st.session_state["last_selection"] = selected
+        st.caption(
+            f"Updated groups for {len(added)} arrival(s) and {len(removed)} departure(s). "
+            "Click Suggest groups to start over."
+        )
 
     if st.button("Suggest groups", disabled=len(selected) == 0):
-        groups, leftovers = suggest_groups(selected, rules, target_size)
+        groups, leftovers = suggest_groups(
+            selected,
+            rules,
+            target_size,
+            mode=mode,
+            time_budget=time_budget,
+            workers=int(workers),
+            seed=int(seed),
+            prefer_familiar=prefer_familiar,
+        )
         if not groups:
             st.warning("No compatible groups with current rules.")
         for k in list(st.session_state.keys()):
             if str(k).startswith("sel_grp_"):
                 del st.session_state[k]
         st.session_state["last_groups"] = groups
+        st.session_state["last_leftovers"] = leftovers
         st.session_state["last_selection"] = selected
         st.session_state["last_date"] = selected_date
         st.session_state["last_slot"] = slot
+        st.session_state["last_rules"] = (rules, target_size)
 
     if "last_groups" in st.session_state and st.session_state["last_groups"]:
         st.subheader("Review suggested groups")
         for i, grp in enumerate(st.session_state["last_groups"], start=1):
-            names = fetch_df(
-                "SELECT name FROM dogs WHERE id IN ({})".format(",".join("?" * len(grp["dogs"]))),
-                grp["dogs"],
-            )["name"].tolist()
+            names = roster.names_for(grp["dogs"])
             st.checkbox(
                 f"Save Group {i} — {grp['status']}: " + ", ".join(names),
                 value=True,
@@ -74,10 +147,7 @@ def page_today():
         all_in_groups = {d for grp in st.session_state["last_groups"] for d in grp["dogs"]}
         leftovers = sorted(set(st.session_state.get("last_selection", [])) - all_in_groups)
         if leftovers:
-            names = fetch_df(
-                "SELECT name FROM dogs WHERE id IN ({})".format(",".join("?" * len(leftovers))),
-                leftovers,
-            )["name"].tolist()
+            names = roster.names_for(leftovers)
             st.info("Leftovers: " + ", ".join(names))
 
         if st.button("Save selected groups"):
@@ -97,3 +167,81 @@ def page_today():
                     st.session_state["last_slot"],
                 )
                 st.success(f"Saved {len(selected_groups)} group(s) and attendance.")
+
+    st.subheader("Plan the whole day")
+    st.caption(
+        "Groups every slot with recorded attendance on this date in one go, keeping "
+        "playmates together from slot to slot. Uses the rules and solver above."
+    )
+    day_attendance = cached_df(
+        """
+        SELECT s.label AS slot, a.dog_id
+        FROM slots s
+        JOIN attendance a ON a.slot_id = s.id
+        WHERE s.date=?
+        ORDER BY s.start_min
+        """,
+        (selected_date,),
+    )
+    if day_attendance.empty:
+        st.caption("No attendance recorded for this date yet.")
+        return
+    by_slot = day_attendance.groupby("slot")["dog_id"].apply(list).to_dict()
+    min_rest = st.slider("Minimum rest between play slots (minutes)", 0, 240, 0, step=15)
+    if st.button(f"Plan {len(by_slot)} slot(s)"):
+        st.session_state["day_plan"] = plan_day(
+            by_slot,
+            rules,
+            target_size,
+            min_rest_minutes=min_rest,
+            mode=mode,
+            time_budget=time_budget,
+            workers=int(workers),
+            seed=int(seed),
+            prefer_familiar=prefer_familiar,
+        )
+        st.session_state["day_plan_date"] = selected_date
+
+    plan = st.session_state.get("day_plan")
+    if plan and st.session_state.get("day_plan_date") == selected_date:
+        for entry in plan:
+            st.markdown(f"**{entry['slot']}**")
+            for i, grp in enumerate(entry["groups"], start=1):
+                st.write(f"Group {i} — {grp['status']}: " + ", ".join(roster.names_for(grp["dogs"])))
+            if entry["leftovers"]:
+                st.caption("Leftovers: " + ", ".join(roster.names_for(entry["leftovers"])))
+            if entry["resting"]:
+                st.caption("Resting: " + ", ".join(roster.names_for(entry["resting"])))
+        saved_slots = set(cached_df(
+            """
+            SELECT s.label FROM slots s
+            WHERE s.date=? AND EXISTS (SELECT 1 FROM groups g WHERE g.slot_id = s.id)
+            """,
+            (selected_date,),
+        )["label"])
+        already = [entry["slot"] for entry in plan if entry["slot"] in saved_slots]
+        replace = False
+        if already:
+            replace = st.checkbox(
+                f"Replace the groups already saved for {', '.join(already)}",
+                False,
+                key=f"replace_day_plan_{selected_date}",
+                help="Unchecked, those slots are skipped and keep their saved groups.",
+            )
+        if st.button("Save day plan"):
+            to_save = [entry for entry in plan if replace or entry["slot"] not in saved_slots]
+            if to_save:
+                save_groups_batch([
+                    {
+                        "date": selected_date,
+                        "slot": entry["slot"],
+                        "groups": entry["groups"],
+                        "dog_ids": [d for grp in entry["groups"] for d in grp["dogs"]],
+                    }
+                    for entry in to_save
+                ], replace=replace)
+            skipped = len(plan) - len(to_save)
+            st.success(
+                f"Saved groups for {len(to_save)} slot(s)."
+                + (f" Skipped {skipped} slot(s) that already had groups." if skipped else "")
+            )
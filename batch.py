@@ -0,0 +1,183 @@
+"""Group every booked slot in a date range without the UI, e.g. from cron.
+
+    python batch.py --from 2030-01-02 --to 2030-01-02 --workers 4
+
+Attendance recorded for each slot is grouped with the same engine as the
+Today page, slots are solved in parallel worker processes, and results are
+saved in batched transactions. Slots that already have saved groups are
+left alone unless --replace is given. A JSON report with timings and
+quality metrics is written to stdout (or --metrics). Neither Streamlit nor
+pandas is imported, so start-up is quick. One run covers one data
+directory; point --data-dir at each location's data to run them all.
+"""
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+from concurrent.futures import ProcessPoolExecutor  # noqa: E402
+from datetime import date, timedelta  # noqa: E402
+
+
+def parse_args(argv=None):
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    parser = argparse.ArgumentParser(description="Precompute playgroups for booked slots.")
+    parser.add_argument("--from", dest="date_from", default=tomorrow, help="first date (default: tomorrow)")
+    parser.add_argument("--to", dest="date_to", help="last date (default: same as --from)")
+    parser.add_argument("--data-dir", help="data directory holding dogs.db (default: the app's)")
+    parser.add_argument("--mode", choices=("greedy", "exact", "multistart", "clique"), default="exact")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="seconds per slot for clique/exact/multistart")
+    parser.add_argument("--size", type=int, default=4, help="max group size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=50, help="slots saved per transaction")
+    parser.add_argument("--allow-unknown", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--separate-hard-shy", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--separate-intact", action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--same-size-only", action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--prefer-familiar", action="store_true", help="break ties by co-play history")
+    parser.add_argument("--replace", action="store_true", help="regroup slots that already have groups")
+    parser.add_argument("--dry-run", action="store_true", help="solve and report without saving")
+    parser.add_argument("--metrics", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    args.date_to = args.date_to or args.date_from
+    return args
+
+
+def _solve_slot(key, allowed, codes, target_size, mode, time_budget, seed, tie_break):
+    """Worker: solve one slot's sub-problem; no database access."""
+    from solver import score_partition, solve
+
+    start = time.perf_counter()
+    groups, leftovers = solve(
+        allowed, codes, target_size, mode=mode, time_budget=time_budget, seed=seed, tie_break=tie_break
+    )
+    elapsed = time.perf_counter() - start
+    return key, groups, leftovers, score_partition(groups, leftovers, codes), elapsed
+
+
+def load_slots(connection, date_from, date_to):
+    """Booked slots in the range: list of (date, slot_id, label, dog_ids, has_groups)."""
+    with connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT s.date, s.id, s.label, a.dog_id,
+                   EXISTS (SELECT 1 FROM groups g WHERE g.slot_id = s.id)
+            FROM slots s
+            JOIN attendance a ON a.slot_id = s.id
+            WHERE s.date BETWEEN ? AND ?
+            ORDER BY s.date, s.start_min, s.id, a.dog_id
+            """,
+            (date_from, date_to),
+        ).fetchall()
+    slots = {}
+    for day, slot_id, label, dog_id, has_groups in rows:
+        slots.setdefault(slot_id, (day, slot_id, label, [], bool(has_groups)))[3].append(dog_id)
+    return list(slots.values())
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.data_dir:
+        os.environ["DOG_PLAYGROUPS_DATA_DIR"] = args.data_dir
+    # config resolves the data directory on import, so the engine comes in after parsing
+    import numpy as np
+
+    from analytics import CoplayMatrix
+    from db import connection, init_db
+    from grouping import allowed_matrix, group_status, load_attrs, save_groups_batch
+    from relationships import RelationshipMatrix
+
+    timings = {"startup": time.perf_counter() - _STARTED}
+    rules = dict(
+        allow_unknown=args.allow_unknown,
+        separate_hard_shy=args.separate_hard_shy,
+        separate_intact=args.separate_intact,
+        same_size_only=args.same_size_only,
+    )
+
+    start = time.perf_counter()
+    init_db()
+    booked = load_slots(connection, args.date_from, args.date_to)
+    todo = [s for s in booked if args.replace or not s[4]]
+    day_ids = list(dict.fromkeys(d for s in todo for d in s[3]))
+    matrix = RelationshipMatrix.load(day_ids)
+    allowed = allowed_matrix(rules, load_attrs(day_ids), matrix)
+    codes = matrix.codes
+    tie_break = CoplayMatrix.load(matrix.ids).plays if args.prefer_familiar else None
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tasks = []
+    for day, slot_id, label, dog_ids, _ in todo:
+        players = [matrix.pos[d] for d in dog_ids]
+        sub = np.ix_(players, players)
+        tasks.append((
+            slot_id, allowed[sub], codes[sub], args.size, args.mode, args.time_budget, args.seed,
+            None if tie_break is None else tie_break[sub],
+        ))
+    if args.workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(tasks))) as pool:
+            results = list(pool.map(_solve_slot, *zip(*tasks)))
+    else:
+        results = [_solve_slot(*task) for task in tasks]
+    timings["solve"] = time.perf_counter() - start
+
+    by_slot = {r[0]: r for r in results}
+    entries, per_slot = [], []
+    for day, slot_id, label, dog_ids, _ in todo:
+        _, pos_groups, pos_leftovers, (left, friends, needs_intro), elapsed = by_slot[slot_id]
+        players = [matrix.pos[d] for d in dog_ids]
+        groups = [
+            {
+                "dogs": [matrix.ids[players[i]] for i in grp],
+                "status": group_status(codes, [players[i] for i in grp]),
+            }
+            for grp in pos_groups
+        ]
+        entries.append({"date": day, "slot": label, "groups": groups, "dog_ids": dog_ids})
+        per_slot.append({
+            "date": day, "slot": label, "dogs": len(dog_ids), "groups": len(groups),
+            "leftovers": left, "friend_pairs": friends, "needs_intro": needs_intro,
+            "solve_seconds": round(elapsed, 4),
+        })
+
+    start = time.perf_counter()
+    if not args.dry_run:
+        for i in range(0, len(entries), args.batch_size):
+            save_groups_batch(entries[i:i + args.batch_size], replace=args.replace)
+    timings["save"] = time.perf_counter() - start
+    timings["total"] = time.perf_counter() - _STARTED
+
+    report = {
+        "date_from": args.date_from,
+        "date_to": args.date_to,
+        "mode": args.mode,
+        "rules": rules,
+        "target_size": args.size,
+        "workers": args.workers,
+        "saved": not args.dry_run,
+        "slots": len(todo),
+        "skipped_already_grouped": len(booked) - len(todo),
+        "dogs": sum(s["dogs"] for s in per_slot),
+        "groups": sum(s["groups"] for s in per_slot),
+        "leftovers": sum(s["leftovers"] for s in per_slot),
+        "friend_pairs": sum(s["friend_pairs"] for s in per_slot),
+        "needs_intro_groups": sum(s["needs_intro"] for s in per_slot),
+        "timings": {k: round(v, 4) for k, v in timings.items()},
+        "per_slot": per_slot,
+    }
+    text = json.dumps(report, indent=2)
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
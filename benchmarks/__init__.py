@@ -0,0 +1,6 @@
+"""Reproducible benchmarks for grouping, imports and page queries.
+
+``synth`` builds seeded synthetic data, ``harness`` times each case at one
+scale and ``run`` drives every scale, writes JSON and compares it with a
+stored baseline. Start with ``python -m benchmarks.run --help``.
+"""
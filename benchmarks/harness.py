@@ -0,0 +1,137 @@
+"""Time every benchmark case at one scale and print the results as JSON.
+
+    python -m benchmarks.harness small --seed 0 --repeats 5
+
+Run by ``benchmarks.run``, one process per scale: ``config`` picks the data
+directory at import, so each scale needs a fresh interpreter pointed at its
+own scratch database.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> generator parameters
+SCALES = {
+    "small": dict(dogs=100, density=0.10, friend_share=0.8, days=60, slots_per_day=3, dogs_per_slot=16),
+    "medium": dict(dogs=500, density=0.05, friend_share=0.8, days=365, slots_per_day=4, dogs_per_slot=24),
+    "large": dict(dogs=2000, density=0.02, friend_share=0.8, days=1095, slots_per_day=4, dogs_per_slot=32),
+}
+
+RULES = dict(allow_unknown=True, separate_hard_shy=True, separate_intact=False, same_size_only=False)
+
+
+def timed(fn, repeats, setup=None):
+    """Run ``fn`` ``repeats`` times (after ``setup`` each time, untimed); returns seconds per run."""
+    runs = []
+    for i in range(repeats):
+        arg = setup(i) if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def summarize(runs):
+    return {
+        "median_ms": round(statistics.median(runs) * 1000, 3),
+        "min_ms": round(min(runs) * 1000, 3),
+        "runs": len(runs),
+    }
+
+
+def run_scale(scale, seed, repeats):
+    os.environ["DOG_PLAYGROUPS_DATA_DIR"] = tempfile.mkdtemp(prefix=f"bench_{scale}_")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import pandas as pd
+
+    import cache
+    from benchmarks import synth
+    from grouping import save_groups, suggest_groups
+    from history import day_slots, day_summaries, history_bounds, slot_groups
+    from importers import import_dogs, import_relationships, normalize_columns
+    from relationships import UnknownPairs
+
+    params = SCALES[scale]
+    start = time.perf_counter()
+    data = synth.populate(seed=seed, **params)
+    setup_seconds = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    dog_ids = data["dog_ids"]
+    slot_dogs = rng.sample(dog_ids, params["dogs_per_slot"])
+    dogs_df = normalize_columns(pd.read_csv(io.StringIO(synth.dogs_csv(data["dog_rows"]))))
+    rel_csv = synth.relationships_csv(data["relationship_rows"], data["names"])
+    days = data["history_days"]
+    first, last = days[0], days[-1]
+
+    def cold(fn):
+        # page queries go through the shared cache; time the query, not a cache hit
+        def run():
+            cache.clear()
+            return fn()
+        return run
+
+    newest = day_summaries(first, last)
+    cursor = newest["date"].iloc[-1]
+    slots = day_slots(last)
+    slot_id = int(slots["id"].iloc[0])
+
+    cases = {
+        "suggest_groups.greedy": lambda: suggest_groups(slot_dogs, RULES, 4),
+        "suggest_groups.multistart": lambda: suggest_groups(slot_dogs, RULES, 4, mode="multistart", restarts=16),
+        "suggest_groups.clique": lambda: suggest_groups(slot_dogs, RULES, 4, mode="clique"),
+        "save_groups": (
+            lambda label: save_groups(
+                [{"dogs": slot_dogs[i:i + 4], "status": "Safe"} for i in range(0, len(slot_dogs), 4)],
+                slot_dogs, "2031-01-01", label,
+            ),
+            lambda i: f"bench {i}",
+        ),
+        # after the warm-up run both imports update rows that already exist
+        "import_dogs": lambda: import_dogs(dogs_df),
+        "import_relationships": lambda: import_relationships(io.StringIO(rel_csv)),
+        "unknown_pairs.build": lambda: UnknownPairs(dog_ids),
+        "history.bounds": cold(history_bounds),
+        "history.first_page": cold(lambda: day_summaries(first, last)),
+        "history.older_page": cold(lambda: day_summaries(first, last, before=cursor)),
+        "history.day_slots": cold(lambda: day_slots(last)),
+        "history.slot_groups": cold(lambda: slot_groups(slot_id)),
+    }
+    unknown = UnknownPairs(dog_ids)
+    cases["unknown_pairs.last_page"] = lambda: unknown.page(max(unknown.total - 100, 0), 100)
+
+    results = {}
+    for name, case in cases.items():
+        fn, setup = case if isinstance(case, tuple) else (case, None)
+        fn() if setup is None else fn(setup(-1))  # warm-up, untimed
+        results[name] = summarize(timed(fn, repeats, setup))
+    return {
+        "params": params,
+        "relationships": len(data["relationship_rows"]),
+        "history_days": len(days),
+        "setup_seconds": round(setup_seconds, 3),
+        "cases": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run every benchmark case at one scale.")
+    parser.add_argument("scale", choices=sorted(SCALES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(run_scale(args.scale, args.seed, args.repeats)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
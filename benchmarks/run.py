@@ -0,0 +1,131 @@
+"""Run the benchmark suite, save the results and compare them with a baseline.
+
+    python -m benchmarks.run --scales small medium --out results.json
+    python -m benchmarks.run --save-baseline          # record this machine's baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+Each scale runs in its own process (see ``benchmarks.harness``). A case is
+flagged as a regression when its median is more than --tolerance slower
+than the baseline's median and also at least --min-delta-ms slower, so
+sub-millisecond noise is not reported. Exits 1 when anything regressed.
+Baselines are machine-specific; record one on the machine that compares.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scales(scales, seed, repeats):
+    results = {}
+    for scale in scales:
+        print(f"running {scale}…", file=sys.stderr, flush=True)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.harness", scale, "--seed", str(seed), "--repeats", str(repeats)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode:
+            raise SystemExit(f"{scale} failed:\n{proc.stderr}")
+        results[scale] = json.loads(proc.stdout)
+    return results
+
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """Cases present in both runs: list of dicts with scale, case, both medians, ratio, regressed."""
+    rows = []
+    for scale, result in current["scales"].items():
+        base_cases = baseline.get("scales", {}).get(scale, {}).get("cases", {})
+        for case, timing in result["cases"].items():
+            if case not in base_cases:
+                continue
+            now, before = timing["median_ms"], base_cases[case]["median_ms"]
+            ratio = now / before if before else float("inf")
+            rows.append({
+                "scale": scale, "case": case, "baseline_ms": before, "median_ms": now,
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + tolerance and now - before >= min_delta_ms,
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"],
+                        choices=("small", "medium", "large"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--out", help="write the results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    import numpy
+    import pandas
+
+    current = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "seed": args.seed,
+            "repeats": args.repeats,
+        },
+        "scales": run_scales(args.scales, args.seed, args.repeats),
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+        rows = []
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(current, json.load(f), args.tolerance, args.min_delta_ms)
+    else:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one", file=sys.stderr)
+        rows = []
+
+    for scale, result in current["scales"].items():
+        print(f"\n{scale}: {result['params']['dogs']} dogs, {result['relationships']} relationships, "
+              f"{result['history_days']} days of history")
+        ratios = {(r["scale"], r["case"]): r for r in rows}
+        for case, timing in result["cases"].items():
+            line = f"  {case:<28} {timing['median_ms']:>10.2f} ms"
+            row = ratios.get((scale, case))
+            if row:
+                line += f"  x{row['ratio']:.2f} vs {row['baseline_ms']:.2f} ms"
+                line += "  REGRESSED" if row["regressed"] else ""
+            print(line)
+
+    regressed = [r for r in rows if r["regressed"]]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Seeded synthetic data: dogs, relationships and saved attendance history.
+
+Everything is drawn from ``random.Random(seed)``, so the same arguments
+always produce the same database and CSV files.
+"""
+import io
+import random
+from datetime import date, timedelta
+
+SLOT_HOURS = (7, 9, 11, 13, 15, 17)
+DOG_COLUMNS = ("name", "size", "plays_hard", "shy", "intact", "notes")
+NOTES = ("gentle", "high energy", "loves fetch", "confident", "needs space", "")
+
+
+def dog_rows(n, rng):
+    """``n`` dog rows in ``DOG_COLUMNS`` order, named "Dog 0001" and so on."""
+    rows = []
+    for i in range(n):
+        temperament = rng.choices(("neither", "hard", "shy"), weights=(7, 2, 1))[0]
+        rows.append((
+            f"Dog {i + 1:04d}", rng.choice("SML"), int(temperament == "hard"),
+            int(temperament == "shy"), int(rng.random() < 0.3), rng.choice(NOTES),
+        ))
+    return rows
+
+
+def relationship_rows(n, density, friend_share, rng):
+    """Known pairs as (a, b, status) over dog numbers 1..n.
+
+    Each of the n*(n-1)/2 pairs gets a status with probability ``density``;
+    ``friend_share`` of those are friends and the rest foes.
+    """
+    rows = []
+    for a in range(1, n + 1):
+        for b in range(a + 1, n + 1):
+            if rng.random() < density:
+                rows.append((a, b, "friend" if rng.random() < friend_share else "foe"))
+    return rows
+
+
+def dogs_csv(rows):
+    out = io.StringIO()
+    out.write(",".join(DOG_COLUMNS) + "\n")
+    for row in rows:
+        out.write(",".join(str(v) for v in row) + "\n")
+    return out.getvalue()
+
+
+def relationships_csv(rows, names):
+    out = io.StringIO()
+    out.write("dog_a,dog_b,status\n")
+    for a, b, status in rows:
+        out.write(f"{names[a - 1]},{names[b - 1]},{status}\n")
+    return out.getvalue()
+
+
+def slot_label(hour):
+    def clock(h):
+        return f"{(h - 1) % 12 + 1}:00 {'AM' if h < 12 else 'PM'}"
+
+    return f"{clock(hour)} - {clock(hour + 1)}"
+
+
+def history_entries(dog_ids, days, slots_per_day, dogs_per_slot, group_size, rng, end=date(2030, 6, 30)):
+    """``save_groups_batch`` entries for ``days`` days ending at ``end``.
+
+    Groups are consecutive chunks of a random sample; the status is drawn,
+    not derived, since only the shape of the history matters here.
+    """
+    entries = []
+    for d in range(days):
+        day = (end - timedelta(days=days - 1 - d)).isoformat()
+        for hour in sorted(rng.sample(SLOT_HOURS, min(slots_per_day, len(SLOT_HOURS)))):
+            dogs = rng.sample(dog_ids, min(dogs_per_slot, len(dog_ids)))
+            groups = [
+                {"dogs": dogs[i:i + group_size], "status": rng.choice(("Safe", "Safe", "Needs Intro"))}
+                for i in range(0, len(dogs) - 1, group_size)
+            ]
+            entries.append({"date": day, "slot": slot_label(hour), "groups": groups, "dog_ids": dogs})
+    return entries
+
+
+def populate(dogs, density, friend_share, days, slots_per_day, dogs_per_slot, group_size=4, seed=0):
+    """Fill the configured (empty) database; returns what the harness needs.
+
+    Import ``db`` only after ``DOG_PLAYGROUPS_DATA_DIR`` points at a scratch
+    directory: this writes straight into it.
+    """
+    from db import init_db, transaction
+    from grouping import save_groups_batch
+
+    rng = random.Random(seed)
+    init_db()
+    dog_table = dog_rows(dogs, rng)
+    rel_rows = relationship_rows(dogs, density, friend_share, rng)
+    with transaction("dogs", "relationships") as conn:
+        conn.executemany(
+            f"INSERT INTO dogs({','.join(DOG_COLUMNS)}) VALUES(?,?,?,?,?,?)", dog_table
+        )
+        conn.executemany(
+            "INSERT INTO relationships(dog_a_id, dog_b_id, status) VALUES(?,?,?)", rel_rows
+        )
+        dog_ids = [r[0] for r in conn.execute("SELECT id FROM dogs ORDER BY id")]
+
+    entries = history_entries(dog_ids, days, slots_per_day, dogs_per_slot, group_size, rng)
+    for i in range(0, len(entries), 200):
+        save_groups_batch(entries[i:i + 200])
+    return {
+        "dog_ids": dog_ids,
+        "names": [r[0] for r in dog_table],
+        "dog_rows": dog_table,
+        "relationship_rows": rel_rows,
+        "history_days": sorted({e["date"] for e in entries}),
+    }
@@ -0,0 +1,68 @@
+import re
+import threading
+from collections import OrderedDict
+
+from db import fetch_df, table_versions
+
+MAX_ENTRIES = 256
+
+TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def tables_in(sql):
+    """Table names a query reads, taken from its FROM and JOIN clauses."""
+    return tuple(sorted(set(TABLE_RE.findall(sql))))
+
+
+def cached(key, tables, build):
+    """Return ``build()``, reusing the last result until one of ``tables`` changes.
+
+    Entries are shared by every session in the process and kept in LRU order,
+    at most ``MAX_ENTRIES`` of them. Writes through ``db.transaction`` or
+    ``write_with_retry`` refresh only the entries that read the tables they
+    name, whichever process made them (see ``db.table_versions``).
+    """
+    versions = table_versions(tables)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == versions:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+    value = build()
+    with _lock:
+        _entries[key] = (versions, value)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+    return value
+
+
+def cached_df(sql, params=(), tables=None):
+    """``fetch_df`` through the cache; tables default to those named in ``sql``.
+
+    Returns a copy, so callers may modify the frame.
+    """
+    params = tuple(params)
+    tables = tables_in(sql) if tables is None else tuple(tables)
+    return cached(("df", sql, params), tables, lambda: fetch_df(sql, params)).copy()
+
+
+def cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def clear():
+    with _lock:
+        _entries.clear()
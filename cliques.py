@@ -0,0 +1,162 @@
+"""Candidate groups as cliques of the compatibility graph.
+
+Two dogs may share a group exactly when ``allowed`` says so, so every valid
+group is a clique of the graph with an edge per allowed pair. The cliques
+are enumerated once, up front, and groups are then assembled from that
+pool; the assembly never re-checks pairs. Foes remove edges, so the
+sparser the graph the fewer cliques there are and the faster this runs.
+"""
+import time
+
+import numpy as np
+
+from relationships import FRIEND
+from solver import CLOCK_EVERY, PAIR_SCORES, constrained_order, from_bits, repair_partition, to_bits
+
+# stop enumerating once this many cliques are pooled
+MAX_CLIQUES = 20_000
+
+
+def adjacency(allowed):
+    """Neighbour bitsets: bit j of ``adj[i]`` is set when i and j may share a group."""
+    off_diag = allowed & ~np.eye(len(allowed), dtype=bool)
+    return [to_bits(row) for row in off_diag]
+
+
+def bounded_cliques(adj, max_size, candidates=None, required=0, limit=MAX_CLIQUES, deadline=None):
+    """Cliques of two or more vertices, none larger than ``max_size``, as bitsets.
+
+    Bron–Kerbosch with Tomita pivoting. A clique is reported when it is
+    maximal or when it reaches ``max_size``, at which point it is not grown
+    further, so every maximal clique of the graph has at least one reported
+    clique inside it. Only vertices in the ``candidates`` bitset are used
+    (default: all), and every clique contains the ``required`` bitset, which
+    must itself be a clique. Enumeration stops after ``limit`` cliques, or
+    once ``time.perf_counter()`` passes ``deadline`` when one is given.
+    """
+    n = len(adj)
+    p = (1 << n) - 1 if candidates is None else candidates
+    p &= ~required
+    for v in from_bits(required):
+        p &= adj[v]
+    out = []
+    stack = [(required, p, 0)]
+    steps = 0
+    while stack and len(out) < limit:
+        if deadline is not None and steps % CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+            break
+        steps += 1
+        r, p, x = stack.pop()
+        size = r.bit_count()
+        if size == max_size or not (p | x):
+            if size > 1:
+                out.append(r)
+            continue
+        if not p:
+            continue  # every extension of r was already covered through x
+        # branch only on vertices the pivot cannot stand in for
+        pivot, best, rest = 0, -1, p | x
+        while rest:
+            low = rest & -rest
+            u = low.bit_length() - 1
+            rest ^= low
+            degree = (adj[u] & p).bit_count()
+            if degree > best:
+                pivot, best = u, degree
+        for v in from_bits(p & ~adj[pivot]):
+            bit = 1 << v
+            stack.append((r | bit, p & adj[v], x & adj[v]))
+            p &= ~bit
+            x |= bit
+    return out
+
+
+def clique_partition(allowed, codes, target_size, tie_break=None, limit=MAX_CLIQUES, deadline=None):
+    """Partition positions into groups taken from the bounded clique pool.
+
+    The pool holds the bounded cliques of the allowed graph and of its
+    friend subgraph. Dogs are visited most-constrained first; an ungrouped
+    dog joins the best clique through it whose members are all still
+    ungrouped (a part of a clique is a clique, so taken members simply drop
+    out). Cliques rank by ``PAIR_SCORES`` total, then ``tie_break`` total,
+    then lowest positions. When every pooled clique through a dog has lost
+    its other members, the cliques through it among the remaining dogs are
+    enumerated afresh. Leftovers finally go through ``repair_partition``.
+
+    ``deadline`` is an optional ``time.perf_counter()`` value. Building the
+    pool may take half of the time up to it, a quarter per graph, and
+    groups are assembled from whatever was pooled by then. If assembly has
+    not finished when the deadline passes, it stops and every position
+    comes back as a leftover with ``info["timed_out"]`` set; callers fall
+    back to another solver.
+
+    Returns (groups, leftovers, info) with the pool size, whether it was cut
+    short by ``limit`` or time, whether the deadline stopped assembly, and
+    how many local re-enumerations were needed.
+    """
+    n = len(allowed)
+    info = {"cliques": 0, "truncated": False, "timed_out": False, "local_searches": 0}
+    if n == 0:
+        return [], [], info
+    adj = adjacency(allowed)
+    quarter = half = None
+    if deadline is not None:
+        now = time.perf_counter()
+        quarter, half = now + (deadline - now) / 4, now + (deadline - now) / 2
+    # pivoting reports few cliques of a dense graph, and not the friendliest
+    # ones; the friend subgraph is usually sparse and supplies exactly those
+    pool = bounded_cliques(adj, target_size, limit=limit, deadline=quarter)
+    late = quarter is not None and time.perf_counter() > quarter
+    pool = list(dict.fromkeys(pool + bounded_cliques(
+        adjacency(allowed & (codes == FRIEND)), target_size, limit=limit, deadline=half
+    )))
+    late = late or (half is not None and time.perf_counter() > half)
+    info["cliques"] = len(pool)
+    info["truncated"] = late or len(pool) >= limit
+    through = [[] for _ in range(n)]
+    for c in pool:
+        for v in from_bits(c):
+            through[v].append(c)
+
+    # groups are small, so plain-list pair sums beat numpy fancy indexing here
+    scores = PAIR_SCORES[codes].tolist()
+    ties = None if tie_break is None else tie_break.tolist()
+    ranks = {}
+
+    def rank(bits):
+        key = ranks.get(bits)
+        if key is None:
+            members = from_bits(bits)
+            pairs = [(a, b) for i, a in enumerate(members) for b in members[i + 1:]]
+            tie = 0 if ties is None else sum(ties[a][b] for a, b in pairs)
+            key = ranks[bits] = (sum(scores[a][b] for a, b in pairs), tie, -bits)
+        return key
+
+    remaining = (1 << n) - 1
+    groups = []
+    for d in constrained_order(allowed):
+        bit = 1 << d
+        if not remaining & bit:
+            continue
+        options = {c & remaining for c in through[d]}
+        options = [c for c in options if c.bit_count() > 1]
+        if not options:
+            info["local_searches"] += 1
+            options = bounded_cliques(
+                adj, target_size, candidates=remaining, required=bit, limit=limit, deadline=deadline
+            )
+        best = None
+        # ranking a full pool takes a while, so the clock is read per slice
+        for i in range(0, len(options), CLOCK_EVERY):
+            if deadline is not None and time.perf_counter() > deadline:
+                info["timed_out"] = True
+                return [], list(range(n)), info
+            top = max(options[i:i + CLOCK_EVERY], key=rank)
+            if best is None or rank(top) > rank(best):
+                best = top
+        if best is not None:
+            groups.append(from_bits(best))
+            remaining &= ~best
+
+    groups, leftovers, _ = repair_partition(groups, from_bits(remaining), allowed, codes, target_size)
+    return groups, leftovers, info
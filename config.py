@@ -5,7 +5,10 @@ from pathlib import Path
 
 def get_data_dir() -> Path:
     """Return the directory where runtime data (db, images) should live."""
-    if getattr(sys, "frozen", False):
+    override = os.environ.get("DOG_PLAYGROUPS_DATA_DIR")
+    if override:
+        base = Path(override)
+    elif getattr(sys, "frozen", False):
         base = Path.home() / "Documents" / "DogPlaygroupsData"
     else:
         base = Path(__file__).resolve().parent
@@ -18,3 +21,9 @@ DATA_DIR = get_data_dir()
 DB_PATH = str(DATA_DIR / "dogs.db")
 IMAGES_DIR = str(DATA_DIR / "images")
 Path(IMAGES_DIR).mkdir(parents=True, exist_ok=True)
+THUMBS_DIR = str(Path(IMAGES_DIR) / "thumbs")
+Path(THUMBS_DIR).mkdir(parents=True, exist_ok=True)
+# upper bound on the thumbnail cache; least recently served thumbnails go first
+THUMB_CACHE_BYTES = 64 * 1024 * 1024
+# launch.log and perf.jsonl; created on first write
+LOG_DIR = str(DATA_DIR / "logs")
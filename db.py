@@ -1,15 +1,320 @@
+import atexit
+import queue
+import random
 import sqlite3
-import pandas as pd
+import threading
+import time
+from contextlib import contextmanager
 
+import perf
 from config import DB_PATH
+from slots import slot_key
 
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.execute("PRAGMA foreign_keys=ON")
-    return conn
+POOL_SIZE = 8
+# seconds a checkout waits for a free connection once POOL_SIZE are in use
+POOL_TIMEOUT = 30.0
 
-def init_db():
-    conn = get_conn()
+# Applied to every pooled connection. WAL itself is persistent and set once in init_db.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+MAINTENANCE_INTERVAL = 300.0
+# seconds between checks for commits made by other processes
+VERSION_POLL_INTERVAL = 1.0
+WRITE_RETRIES = 5
+WRITE_BACKOFF = 0.05
+WRITE_BACKOFF_MAX = 1.0
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared across sessions.
+
+    At most ``max_size`` connections are checked out at once; further
+    checkouts wait up to ``timeout`` seconds for one to come back, then
+    raise ``sqlite3.OperationalError``.
+    """
+
+    def __init__(self, path, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._checked_out = set()
+        self._closed = False
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+        self._last_maintenance = time.monotonic()
+        self.stats = {
+            "opens": 0, "reuses": 0, "closes": 0, "leaks": 0, "waits": 0, "timeouts": 0,
+            "write_retries": 0, "maintenance_runs": 0,
+        }
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self.stats["opens"] += 1
+        return conn
+
+    def _close(self, conn):
+        conn.close()
+        with self._lock:
+            self.stats["closes"] += 1
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            self.count("waits")
+            if not self._slots.acquire(timeout=self.timeout):
+                self.count("timeouts")
+                raise sqlite3.OperationalError(
+                    f"no database connection free after {self.timeout:g}s ({self.max_size} in use)"
+                )
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.stats["reuses"] += 1
+        except queue.Empty:
+            try:
+                conn = self._open()
+            except BaseException:
+                self._slots.release()
+                raise
+        with self._lock:
+            self._checked_out.add(conn)
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            self._checked_out.discard(conn)
+            closed = self._closed
+        try:
+            if conn.in_transaction:
+                # never hand out a connection with someone else's half-done work
+                conn.rollback()
+                with self._lock:
+                    self.stats["leaks"] += 1
+            if closed:
+                self._close(conn)
+                return
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                self._close(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        trace = perf.current()
+        with perf.span("db.acquire"):
+            conn = self.acquire()
+        if trace is not None:
+            # count every statement this checkout runs, BEGIN/COMMIT included
+            trace.checkouts += 1
+            conn.set_trace_callback(trace.statement)
+        try:
+            yield conn
+        finally:
+            if trace is not None:
+                conn.set_trace_callback(None)
+            self.release(conn)
+
+    def stored_versions(self, seen):
+        """Read the table_versions rows if the database changed since ``seen``.
+
+        Uses a connection kept out of circulation, whose ``PRAGMA
+        data_version`` changes whenever any other connection commits, in this
+        process or another. Returns (data_version, {table: version}), with
+        None instead of the dict when data_version is still ``seen``, and
+        (None, None) once the pool is closed.
+        """
+        with self._watcher_lock:
+            if self._watcher is None:
+                if self._closed:
+                    return None, None
+                self._watcher = self._open()
+            version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            if version == seen:
+                return version, None
+            rows = self._watcher.execute("SELECT name, version FROM table_versions").fetchall()
+            return version, dict(rows)
+
+    def close_all(self):
+        with self._lock:
+            self._closed = True
+            self.stats["leaks"] += len(self._checked_out)
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._close(self._watcher)
+                self._watcher = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(conn)
+
+    def maintenance_due(self):
+        with self._lock:
+            if time.monotonic() - self._last_maintenance < MAINTENANCE_INTERVAL:
+                return False
+            self._last_maintenance = time.monotonic()
+            self.stats["maintenance_runs"] += 1
+            return True
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_use"] = len(self._checked_out)
+        stats["idle"] = self._idle.qsize()
+        return stats
+
+
+_pool = ConnectionPool(DB_PATH)
+atexit.register(_pool.close_all)
+
+# Tables a write can reach through ON DELETE CASCADE and triggers.
+TABLE_DEPENDENTS = {
+    "dogs": ("relationships", "attendance", "group_members", "pair_stats"),
+    "slots": ("attendance", "groups", "group_members", "pair_stats"),
+    "groups": ("group_members", "pair_stats"),
+    "group_members": ("pair_stats",),
+}
+
+# Every committed write bumps the stored version of the tables it names in
+# table_versions, inside the same transaction. _versions mirrors those rows:
+# this process's own commits update it directly, and commits by other
+# processes are picked up by polling the pool's watcher at most once per
+# VERSION_POLL_INTERVAL. Readers compare versions instead of querying data.
+_versions = {}
+_versions_lock = threading.Lock()
+_seen_data_version = None
+_next_poll = 0.0
+
+
+def _bump_versions(conn, tables):
+    """Bump the stored versions of ``tables`` and the tables their writes cascade to."""
+    touched = set(tables)
+    for table in tables:
+        touched.update(TABLE_DEPENDENTS.get(table, ()))
+    return {
+        table: conn.execute(
+            "INSERT INTO table_versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1 RETURNING version",
+            (table,),
+        ).fetchone()[0]
+        for table in sorted(touched)
+    }
+
+
+def _note_versions(versions):
+    with _versions_lock:
+        for table, version in versions.items():
+            if version > _versions.get(table, 0):
+                _versions[table] = version
+
+
+def _poll_versions():
+    global _seen_data_version, _next_poll
+    now = time.monotonic()
+    with _versions_lock:
+        if now < _next_poll:
+            return
+        _next_poll = now + VERSION_POLL_INTERVAL
+        seen = _seen_data_version
+    data_version, stored = _pool.stored_versions(seen)
+    if stored is not None:
+        _note_versions(stored)
+        with _versions_lock:
+            _seen_data_version = data_version
+
+
+def table_versions(tables):
+    """Current version of each of ``tables``.
+
+    Only the tables a commit names (and their dependents) move, whether the
+    commit came from this process or another. Other processes' commits show
+    up within ``VERSION_POLL_INTERVAL`` seconds; between polls this costs no
+    queries.
+    """
+    _poll_versions()
+    with _versions_lock:
+        return tuple(_versions.get(table, 0) for table in tables)
+
+
+def connection():
+    """Check out a pooled connection; it goes back to the pool on exit."""
+    return _pool.connection()
+
+
+@contextmanager
+def transaction(*tables):
+    """Check out a connection and run the block in one committed transaction.
+
+    BEGIN IMMEDIATE takes the write lock up front, so a busy database is waited
+    on by busy_timeout instead of failing later on a read-to-write upgrade.
+    ``tables`` names the tables the block writes; their versions are bumped
+    in the same transaction, so cached reads of them are refreshed.
+    """
+    with _pool.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            versions = _bump_versions(conn, tables)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        _note_versions(versions)
+        if _pool.maintenance_due():
+            run_maintenance(conn)
+
+
+def is_busy_error(exc):
+    msg = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and ("locked" in msg or "busy" in msg)
+
+
+def write_with_retry(work, retries=WRITE_RETRIES, tables=()):
+    """Run ``work(conn)`` in a transaction, retrying with backoff while the db is locked.
+
+    ``tables`` is passed on to ``transaction``.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with transaction(*tables) as conn:
+                return work(conn)
+        except sqlite3.OperationalError as exc:
+            if attempt == retries or not is_busy_error(exc):
+                raise
+            _pool.count("write_retries")
+            delay = min(WRITE_BACKOFF * (2 ** attempt), WRITE_BACKOFF_MAX)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def run_maintenance(conn):
+    """Fold the WAL back into the main file and refresh planner statistics."""
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    conn.execute("PRAGMA optimize")
+
+
+def pool_stats():
+    return _pool.snapshot()
+
+
+def _create_base_tables(conn):
     cur = conn.cursor()
     cur.execute("""
     CREATE TABLE IF NOT EXISTS dogs(
@@ -62,7 +367,260 @@ def init_db():
         FOREIGN KEY(dog_id) REFERENCES dogs(id) ON DELETE CASCADE
     )
     """)
-    conn.commit()
+
+
+def _add_lookup_indexes(conn):
+    # Browse relationships: WHERE status=? ORDER BY id, without touching the table
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_relationships_status "
+        "ON relationships(status, id, dog_a_id, dog_b_id)"
+    )
+    # lookups from the second dog of a pair, and cascading deletes of that dog
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_relationships_dog_b "
+        "ON relationships(dog_b_id, dog_a_id, status)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_dog ON attendance(dog_id, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_group_members_dog ON group_members(dog_id, date)")
+
+
+def _normalize_slots(conn):
+    """Key history on integer slot IDs instead of repeating date and slot text.
+
+    A slot row is one play session: a date plus a time range. Labels in the
+    old tables are parsed into start/end minutes where possible; free text is
+    kept as the label with no times. Rows are copied, then the old tables
+    are replaced.
+    """
+    conn.execute("""
+    CREATE TABLE slots(
+        id INTEGER PRIMARY KEY,
+        date TEXT NOT NULL,
+        label TEXT NOT NULL,
+        start_min INTEGER,
+        end_min INTEGER,
+        UNIQUE(date, label)
+    )
+    """)
+    conn.execute("CREATE INDEX idx_slots_date_start ON slots(date, start_min)")
+    conn.execute("""
+    CREATE TABLE attendance_new(
+        slot_id INTEGER NOT NULL REFERENCES slots(id) ON DELETE CASCADE,
+        dog_id INTEGER NOT NULL REFERENCES dogs(id) ON DELETE CASCADE,
+        PRIMARY KEY(slot_id, dog_id)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    CREATE TABLE groups_new(
+        slot_id INTEGER NOT NULL REFERENCES slots(id) ON DELETE CASCADE,
+        group_name TEXT NOT NULL,
+        notes TEXT,
+        PRIMARY KEY(slot_id, group_name)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    CREATE TABLE group_members_new(
+        slot_id INTEGER NOT NULL REFERENCES slots(id) ON DELETE CASCADE,
+        group_name TEXT NOT NULL,
+        dog_id INTEGER NOT NULL REFERENCES dogs(id) ON DELETE CASCADE,
+        PRIMARY KEY(slot_id, group_name, dog_id)
+    ) WITHOUT ROWID
+    """)
+
+    old_keys = conn.execute(
+        "SELECT date, slot FROM attendance UNION SELECT date, slot FROM groups "
+        "UNION SELECT date, slot FROM group_members"
+    ).fetchall()
+    conn.execute("CREATE TEMP TABLE slot_map(date TEXT, slot TEXT, slot_id INTEGER, PRIMARY KEY(date, slot))")
+    for day, old in old_keys:
+        label, start_min, end_min = slot_key(old)
+        conn.execute(
+            "INSERT OR IGNORE INTO slots(date, label, start_min, end_min) VALUES(?,?,?,?)",
+            (day, label, start_min, end_min),
+        )
+        conn.execute(
+            "INSERT INTO slot_map SELECT ?, ?, id FROM slots WHERE date=? AND label=?",
+            (day, old, day, label),
+        )
+    conn.execute(
+        "INSERT OR IGNORE INTO attendance_new SELECT m.slot_id, a.dog_id "
+        "FROM attendance a JOIN slot_map m ON m.date=a.date AND m.slot=a.slot"
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO groups_new SELECT m.slot_id, g.group_name, g.notes "
+        "FROM groups g JOIN slot_map m ON m.date=g.date AND m.slot=g.slot"
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO group_members_new SELECT m.slot_id, gm.group_name, gm.dog_id "
+        "FROM group_members gm JOIN slot_map m ON m.date=gm.date AND m.slot=gm.slot"
+    )
+    conn.execute("DROP TABLE slot_map")
+    for table in ("attendance", "groups", "group_members"):
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    conn.execute("CREATE INDEX idx_attendance_dog ON attendance(dog_id, slot_id)")
+    conn.execute("CREATE INDEX idx_group_members_dog ON group_members(dog_id, slot_id)")
+
+
+def rebuild_pair_stats(conn):
+    """Recount pair_stats from group_members in one pass."""
+    conn.execute("DELETE FROM pair_stats")
+    conn.execute("""
+    INSERT INTO pair_stats(dog_a_id, dog_b_id, plays, safe_plays, intro_plays, last_date)
+    SELECT x.dog_id, y.dog_id, COUNT(*),
+           SUM(g.notes = 'Safe'), SUM(g.notes = 'Needs Intro'), MAX(s.date)
+    FROM group_members x
+    JOIN group_members y
+      ON y.slot_id = x.slot_id AND y.group_name = x.group_name AND y.dog_id > x.dog_id
+    JOIN groups g ON g.slot_id = x.slot_id AND g.group_name = x.group_name
+    JOIN slots s ON s.id = x.slot_id
+    GROUP BY x.dog_id, y.dog_id
+    """)
+
+
+def _add_pair_stats(conn):
+    """Co-play counts per pair of dogs, kept current by triggers on group_members.
+
+    Deleting a group or slot deletes its members first (BEFORE triggers), so
+    the member trigger can still read the group's status and date when it
+    takes a play back off the counts.
+    """
+    conn.execute("""
+    CREATE TABLE pair_stats(
+        dog_a_id INTEGER NOT NULL REFERENCES dogs(id) ON DELETE CASCADE,
+        dog_b_id INTEGER NOT NULL REFERENCES dogs(id) ON DELETE CASCADE,
+        plays INTEGER NOT NULL DEFAULT 0,
+        safe_plays INTEGER NOT NULL DEFAULT 0,
+        intro_plays INTEGER NOT NULL DEFAULT 0,
+        last_date TEXT,
+        PRIMARY KEY(dog_a_id, dog_b_id)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_pair_stats_dog_b ON pair_stats(dog_b_id, dog_a_id)")
+    conn.execute("""
+    CREATE TRIGGER pair_stats_member_insert AFTER INSERT ON group_members BEGIN
+        INSERT INTO pair_stats(dog_a_id, dog_b_id, plays, safe_plays, intro_plays, last_date)
+        SELECT min(NEW.dog_id, gm.dog_id), max(NEW.dog_id, gm.dog_id), 1,
+               COALESCE(g.notes = 'Safe', 0), COALESCE(g.notes = 'Needs Intro', 0), s.date
+        FROM group_members gm
+        JOIN slots s ON s.id = NEW.slot_id
+        LEFT JOIN groups g ON g.slot_id = NEW.slot_id AND g.group_name = NEW.group_name
+        WHERE gm.slot_id = NEW.slot_id AND gm.group_name = NEW.group_name AND gm.dog_id != NEW.dog_id
+        ON CONFLICT(dog_a_id, dog_b_id) DO UPDATE SET
+            plays = plays + 1,
+            safe_plays = safe_plays + excluded.safe_plays,
+            intro_plays = intro_plays + excluded.intro_plays,
+            last_date = max(COALESCE(last_date, ''), excluded.last_date);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER pair_stats_member_delete AFTER DELETE ON group_members BEGIN
+        UPDATE pair_stats SET
+            plays = plays - 1,
+            safe_plays = safe_plays - COALESCE((
+                SELECT notes = 'Safe' FROM groups
+                WHERE slot_id = OLD.slot_id AND group_name = OLD.group_name), 0),
+            intro_plays = intro_plays - COALESCE((
+                SELECT notes = 'Needs Intro' FROM groups
+                WHERE slot_id = OLD.slot_id AND group_name = OLD.group_name), 0)
+        WHERE (dog_a_id, dog_b_id) IN (
+            SELECT min(OLD.dog_id, dog_id), max(OLD.dog_id, dog_id) FROM group_members
+            WHERE slot_id = OLD.slot_id AND group_name = OLD.group_name
+        );
+        DELETE FROM pair_stats WHERE plays <= 0 AND (dog_a_id = OLD.dog_id OR dog_b_id = OLD.dog_id);
+        UPDATE pair_stats SET last_date = (
+            SELECT MAX(s.date) FROM group_members x
+            JOIN group_members y
+              ON y.slot_id = x.slot_id AND y.group_name = x.group_name AND y.dog_id = pair_stats.dog_b_id
+            JOIN slots s ON s.id = x.slot_id
+            WHERE x.dog_id = pair_stats.dog_a_id
+        )
+        WHERE last_date = (SELECT date FROM slots WHERE id = OLD.slot_id)
+          AND (dog_a_id, dog_b_id) IN (
+            SELECT min(OLD.dog_id, dog_id), max(OLD.dog_id, dog_id) FROM group_members
+            WHERE slot_id = OLD.slot_id AND group_name = OLD.group_name
+        );
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER groups_delete_members BEFORE DELETE ON groups BEGIN
+        DELETE FROM group_members WHERE slot_id = OLD.slot_id AND group_name = OLD.group_name;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER slots_delete_groups BEFORE DELETE ON slots BEGIN
+        DELETE FROM groups WHERE slot_id = OLD.id;
+    END
+    """)
+    rebuild_pair_stats(conn)
+
+
+def _add_table_versions(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS table_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """)
+
+
+# MIGRATIONS[i] upgrades a database from schema version i to i + 1. Append only.
+MIGRATIONS = [
+    _create_base_tables,
+    _add_lookup_indexes,
+    _normalize_slots,
+    _add_pair_stats,
+    _add_table_versions,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def init_db():
+    """Bring the database up to SCHEMA_VERSION, recording it in user_version.
+
+    Runs once per process; later calls (every Streamlit rerun) return at once.
+    An up-to-date database is recognized from two pragma reads, without
+    taking the write lock, so a normal start never waits on other writers.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        with connection() as conn:
+            current = (
+                schema_version(conn) == SCHEMA_VERSION
+                and conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            )
+            if not current:
+                conn.execute("PRAGMA journal_mode=WAL")
+        if not current:
+            with transaction() as conn:
+                version = schema_version(conn)
+                for migrate in MIGRATIONS[version:]:
+                    migrate(conn)
+                versions = {}
+                if version < SCHEMA_VERSION:
+                    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+                    versions = _bump_versions(conn, (*TABLE_DEPENDENTS, "relationships"))
+            _note_versions(versions)
+        _initialized = True
+
 
 def fetch_df(sql, params=()):
-    return pd.read_sql_query(sql, get_conn(), params=params)
+    # pandas is imported on first use so headless tools (batch.py) start fast
+    import pandas as pd
+
+    with perf.span("fetch_df"), connection() as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    perf.record_query(len(df))
+    return df
@@ -1,7 +1,11 @@
-from itertools import combinations
+import numpy as np
 
-from db import fetch_df, get_conn
-from relationships import get_relationship
+import perf
+from analytics import CoplayMatrix
+from db import connection, write_with_retry
+from relationships import FOE, ID_CHUNK, UNKNOWN, RelationshipMatrix
+from slots import slot_ids
+from solver import SOLVER_MODES, repair_partition, solve
 
 def allowed_pair(a_id, b_id, rules, status, attrs):
     if status == "foe":
@@ -19,86 +23,195 @@ def allowed_pair(a_id, b_id, rules, status, attrs):
         return False
     return True
 
-def suggest_groups(dog_ids, rules, target_size):
+def load_attrs(dog_ids):
+    ids = list(dict.fromkeys(int(d) for d in dog_ids))
+    attrs = {}
+    with connection() as conn:
+        for start in range(0, len(ids), ID_CHUNK):
+            chunk = ids[start:start + ID_CHUNK]
+            rows = conn.execute(
+                "SELECT id, plays_hard, shy, intact, size FROM dogs WHERE id IN ({})".format(
+                    ",".join("?" * len(chunk))
+                ),
+                chunk,
+            )
+            for did, hard, shy, intact, size in rows:
+                attrs[did] = (bool(hard), bool(shy), bool(intact), (size or "M"))
+    return attrs
+
+def allowed_matrix(rules, attrs, matrix):
+    """Evaluate ``allowed_pair`` for every pair of ``matrix.ids`` at once.
+
+    Returns an n x n boolean array where ``[i, j]`` equals
+    ``allowed_pair(ids[i], ids[j], rules, matrix.status(ids[i], ids[j]), attrs)``.
+    """
+    rows = [attrs[did] for did in matrix.ids]
+    hard = np.array([r[0] for r in rows], dtype=bool)
+    shy = np.array([r[1] for r in rows], dtype=bool)
+    intact = np.array([r[2] for r in rows], dtype=bool)
+    size = np.array([r[3] for r in rows], dtype=object)
+
+    codes = matrix.codes
+    ok = codes != FOE
+    if not rules["allow_unknown"]:
+        ok &= codes != UNKNOWN
+    if rules["separate_hard_shy"]:
+        ok &= ~((hard[:, None] & shy[None, :]) | (shy[:, None] & hard[None, :]))
+    if rules["separate_intact"]:
+        ok &= ~(intact[:, None] & intact[None, :])
+    if rules["same_size_only"]:
+        ok &= size[:, None] == size[None, :]
+    return ok
+
+def group_status(codes, group):
+    sub = codes[np.ix_(group, group)]
+    return "Needs Intro" if (sub == UNKNOWN).any() else "Safe"
+
+@perf.timed("suggest_groups")
+def suggest_groups(
+    dog_ids, rules, target_size, mode="greedy", time_budget=2.0, restarts=64, workers=1, seed=0,
+    prefer_familiar=False,
+):
+    """Split ``dog_ids`` into compatible groups; returns (groups, leftovers).
+
+    ``mode="greedy"`` is the fast single pass. ``mode="exact"`` runs the
+    branch-and-bound solver from the greedy result and returns the best
+    partition found within ``time_budget`` seconds. ``mode="multistart"``
+    keeps the best of ``restarts`` randomized greedy runs spread over
+    ``workers`` processes; the result is reproducible for a given ``seed``.
+    ``mode="clique"`` builds groups from the precomputed compatible cliques
+    of the selected dogs (see ``cliques``), falling back to the greedy
+    result if that takes longer than ``time_budget`` seconds.
+
+    With ``prefer_familiar``, candidates that score the same are ranked by
+    how often they have played with the group before (see ``analytics``).
+    The exact solver only sees this through its greedy starting points.
+    """
     if not dog_ids:
         return [], []
+    if mode not in SOLVER_MODES:
+        raise ValueError(f"Unknown grouping mode: {mode}")
 
-    query = "SELECT id, plays_hard, shy, intact, size FROM dogs WHERE id IN ({})".format(
-        ",".join("?" * len(dog_ids))
-    )
-    df = fetch_df(query, dog_ids)
-    attrs = {
-        int(r.id): (bool(r.plays_hard), bool(r.shy), bool(r.intact), (r.size or "M"))
-        for _, r in df.iterrows()
-    }
-
-    rel_cache = {}
-
-    def rel(a, b):
-        key = tuple(sorted((a, b)))
-        if key not in rel_cache:
-            rel_cache[key] = get_relationship(a, b)
-        return rel_cache[key]
-
-    remaining = set(dog_ids)
-    groups, leftovers = [], []
-
-    def compatibility_score(cand, group):
-        score = 0
-        for g in group:
-            s = rel(cand, g)
-            score += 2 if s == "friend" else (1 if s == "unknown" else -999)
-        return score
-
-    while remaining:
-        seed = remaining.pop()
-        group = [seed]
-
-        while len(group) < target_size:
-            best = None
-            best_score = -10
-            for cand in list(remaining):
-                if all(allowed_pair(cand, g, rules, rel(cand, g), attrs) for g in group):
-                    sc = compatibility_score(cand, group)
-                    if sc > best_score:
-                        best = cand
-                        best_score = sc
-            if best is None:
-                break
-            group.append(best)
-            remaining.remove(best)
-
-        fully_ok = all(
-            allowed_pair(a, b, rules, rel(a, b), attrs) for a, b in combinations(group, 2)
+    with perf.span("suggest_groups.load"):
+        attrs = load_attrs(dog_ids)
+        matrix = RelationshipMatrix.load(dog_ids)
+        tie_break = CoplayMatrix.load(matrix.ids).plays if prefer_familiar else None
+    with perf.span("suggest_groups.allowed"):
+        allowed = allowed_matrix(rules, attrs, matrix)
+    codes = matrix.codes
+
+    with perf.span(f"suggest_groups.solve.{mode}"):
+        pos_groups, pos_leftovers = solve(
+            allowed, codes, target_size, mode=mode, time_budget=time_budget,
+            restarts=restarts, workers=workers, seed=seed, tie_break=tie_break,
         )
-        if fully_ok and len(group) > 1:
-            statuses = [rel(a, b) for a, b in combinations(group, 2)]
-            groups.append({
-                "dogs": group,
-                "status": "Needs Intro" if any(s == "unknown" for s in statuses) else "Safe"
-            })
+
+    with perf.span("suggest_groups.status"):
+        ids = matrix.ids
+        groups = [
+            {"dogs": [ids[p] for p in grp], "status": group_status(codes, grp)}
+            for grp in pos_groups
+        ]
+    return groups, [ids[p] for p in pos_leftovers]
+
+@perf.timed("regroup")
+def regroup(groups, leftovers, added, removed, rules, target_size):
+    """Repair an earlier ``suggest_groups`` result after arrivals and departures.
+
+    Groups that lose no one and gain no one are returned untouched. Departed
+    dogs are dropped from their groups; a group left with one dog dissolves.
+    Arrivals, dissolved dogs and earlier leftovers are then placed one at a
+    time into the best group with room they are allowed to join, and whoever
+    is still unplaced is grouped among themselves with the greedy pass. Only
+    the changed dogs' relationships are read, so the cost follows the size of
+    the change rather than the roster.
+    """
+    removed = {int(d) for d in removed}
+    kept, free, shrunk = [], [], []
+    for grp in groups:
+        members = [d for d in grp["dogs"] if d not in removed]
+        if len(members) == len(grp["dogs"]):
+            kept.append({"dogs": list(members), "status": grp["status"]})
+        elif len(members) > 1:
+            kept.append({"dogs": members, "status": grp["status"]})
+            shrunk.append(len(kept) - 1)
         else:
-            leftovers.extend(group)
+            free.extend(members)
+    present = {d for grp in kept for d in grp["dogs"]}
+    for did in list(leftovers) + list(added):
+        did = int(did)
+        if did not in removed and did not in present:
+            free.append(did)
+            present.add(did)
+    if not free and not shrunk:
+        return kept, []
+
+    open_groups = [i for i, grp in enumerate(kept) if len(grp["dogs"]) < target_size]
+    focus = free + [d for i in shrunk for d in kept[i]["dogs"]]
+    ids = free + [d for i in open_groups for d in kept[i]["dogs"]]
+    ids += [d for i in shrunk if i not in open_groups for d in kept[i]["dogs"]]
+    matrix = RelationshipMatrix.load(ids, focus=focus)
+    allowed = allowed_matrix(rules, load_attrs(ids), matrix)
+    pos, codes = matrix.pos, matrix.codes
 
-    return groups, leftovers
+    pos_groups, pos_leftovers, placed = repair_partition(
+        [[pos[d] for d in kept[i]["dogs"]] for i in open_groups],
+        [pos[d] for d in free],
+        allowed,
+        codes,
+        target_size,
+    )
+    for k, members in enumerate(pos_groups):
+        if k < len(open_groups):
+            i = open_groups[k]
+            kept[i]["dogs"] = [matrix.ids[p] for p in members]
+            # pairs among the old members are only loaded for shrunk groups, so
+            # a grown group keeps its old status unless a newcomer needs an intro
+            if any((codes[p, members] == UNKNOWN).any() for p in placed.get(k, [])):
+                kept[i]["status"] = "Needs Intro"
+        else:
+            kept.append({"dogs": [matrix.ids[p] for p in members], "status": group_status(codes, members)})
+    for i in shrunk:
+        kept[i]["status"] = group_status(codes, [pos[d] for d in kept[i]["dogs"]])
+    return kept, [matrix.ids[p] for p in pos_leftovers]
 
 def save_groups(groups, selected_ids, selected_date, slot):
-    conn = get_conn()
-    cur = conn.cursor()
-    for did in selected_ids:
-        cur.execute(
-            "INSERT OR IGNORE INTO attendance(date,slot,dog_id) VALUES(?,?,?)",
-            (selected_date, slot, did)
+    save_groups_batch([
+        {"date": selected_date, "slot": slot, "groups": groups, "dog_ids": selected_ids}
+    ])
+
+def save_attendance(selected_date, slot, dog_ids):
+    save_groups_batch([{"date": selected_date, "slot": slot, "groups": [], "dog_ids": dog_ids}])
+
+@perf.timed("save_groups")
+def save_groups_batch(entries, replace=False):
+    """Save several slots' groups and attendance in one transaction.
+
+    Each entry is a dict with ``date``, ``slot`` (the slot label),
+    ``groups`` (as returned by ``suggest_groups``) and ``dog_ids`` (the
+    attendance to record). Missing slot rows are created on the way. With
+    ``replace``, groups already saved for those slots are deleted first.
+    """
+    def write(conn):
+        ids = slot_ids(conn, [(entry["date"], entry["slot"]) for entry in entries])
+        if replace:
+            conn.executemany("DELETE FROM groups WHERE slot_id=?", [(sid,) for sid in set(ids.values())])
+        attendance, group_rows, member_rows = [], [], []
+        for entry in entries:
+            sid = ids[(entry["date"], entry["slot"])]
+            attendance.extend((sid, int(did)) for did in entry["dog_ids"])
+            for i, grp in enumerate(entry["groups"], start=1):
+                gname = f"Group {i}"
+                group_rows.append((sid, gname, grp["status"]))
+                member_rows.extend((sid, gname, int(did)) for did in grp["dogs"])
+
+        conn.executemany("INSERT OR IGNORE INTO attendance(slot_id,dog_id) VALUES(?,?)", attendance)
+        conn.executemany(
+            "INSERT OR IGNORE INTO groups(slot_id,group_name,notes) VALUES(?,?,?)", group_rows
         )
-    for i, grp in enumerate(groups, start=1):
-        gname = f"Group {i}"
-        cur.execute(
-            "INSERT OR IGNORE INTO groups(date,slot,group_name,notes) VALUES(?,?,?,?)",
-            (selected_date, slot, gname, grp["status"])
+        conn.executemany(
+            "INSERT OR IGNORE INTO group_members(slot_id,group_name,dog_id) VALUES(?,?,?)",
+            member_rows,
         )
-        for did in grp["dogs"]:
-            cur.execute(
-                "INSERT OR IGNORE INTO group_members(date,slot,group_name,dog_id) VALUES(?,?,?,?)",
-                (selected_date, slot, gname, did)
-            )
-    conn.commit()
+
+    write_with_retry(write, tables=("slots", "attendance", "groups", "group_members"))
@@ -0,0 +1,118 @@
+from cache import cached_df
+
+DAYS_PER_PAGE = 14
+
+TIMES_OF_DAY = {
+    "Any time": None,
+    "Morning": (0, 12 * 60),
+    "Afternoon": (12 * 60, 17 * 60),
+    "Evening": (17 * 60, 24 * 60),
+}
+
+
+def _slot_filter(date_from, date_to, time_range=None):
+    """WHERE clause over ``slots s`` for saved slots in a date range and time of day."""
+    sql = (
+        "s.date BETWEEN ? AND ? "
+        "AND EXISTS (SELECT 1 FROM groups g WHERE g.slot_id = s.id)"
+    )
+    params = [date_from, date_to]
+    if time_range is not None:
+        sql += " AND s.start_min >= ? AND s.start_min < ?"
+        params += list(time_range)
+    return sql, params
+
+
+def history_bounds_query():
+    saved = "SELECT date FROM slots s WHERE EXISTS (SELECT 1 FROM groups g WHERE g.slot_id = s.id)"
+    sql = f"SELECT ({saved} ORDER BY date LIMIT 1) AS first, ({saved} ORDER BY date DESC LIMIT 1) AS last"
+    return sql, ()
+
+
+def history_bounds():
+    """(first, last) ISO dates with saved groups, or None when there are none."""
+    df = cached_df(*history_bounds_query())
+    if df["first"].isna().all():
+        return None
+    return df["first"][0], df["last"][0]
+
+
+def day_summaries_query(date_from, date_to, time_range=None, before=None, limit=DAYS_PER_PAGE):
+    where, params = _slot_filter(date_from, date_to, time_range)
+    page_where, page_params = where, list(params)
+    if before is not None:
+        page_where += " AND s.date < ?"
+        page_params.append(before)
+    # CROSS JOIN pins the page's slots as the outer loop; left to itself the
+    # planner may walk the whole group_members index instead
+    sql = f"""
+        WITH days AS (
+            SELECT DISTINCT s.date FROM slots s WHERE {page_where}
+            ORDER BY s.date DESC LIMIT ?
+        ),
+        day_slots AS (
+            SELECT s.id, s.date FROM slots s JOIN days d ON d.date = s.date WHERE {where}
+        ),
+        group_counts AS (
+            SELECT ds.date,
+                   COUNT(DISTINCT ds.id) AS slots,
+                   COUNT(*) AS groups,
+                   SUM(g.notes = 'Needs Intro') AS needs_intro
+            FROM day_slots ds CROSS JOIN groups g ON g.slot_id = ds.id
+            GROUP BY ds.date
+        ),
+        dog_counts AS (
+            SELECT ds.date, COUNT(DISTINCT gm.dog_id) AS dogs
+            FROM day_slots ds CROSS JOIN group_members gm ON gm.slot_id = ds.id
+            GROUP BY ds.date
+        )
+        SELECT gc.date, gc.slots, gc.groups, COALESCE(dc.dogs, 0) AS dogs,
+               ROUND(1.0 * gc.needs_intro / gc.groups, 3) AS needs_intro_share
+        FROM group_counts gc LEFT JOIN dog_counts dc ON dc.date = gc.date
+        ORDER BY gc.date DESC
+        """
+    return sql, page_params + [int(limit)] + params
+
+
+def day_summaries(date_from, date_to, time_range=None, before=None, limit=DAYS_PER_PAGE):
+    """One summary row per saved day, newest first, for one page of days.
+
+    Pages are keyed on a cursor rather than an offset: pass the oldest date
+    of the previous page as ``before`` to get the next one. The page's days
+    are picked first through the slots (date, start_min) index and only
+    their slots are aggregated, so a page costs the same however much
+    history there is. Columns: date, slots, groups, dogs (distinct dogs in a
+    group that day) and needs_intro_share.
+    """
+    return cached_df(*day_summaries_query(date_from, date_to, time_range, before, limit))
+
+
+def day_slots_query(day, time_range=None):
+    where, params = _slot_filter(day, day, time_range)
+    return f"SELECT s.id, s.label FROM slots s WHERE {where} ORDER BY s.start_min, s.label", params
+
+
+def day_slots(day, time_range=None):
+    """Saved slots of one day in start-time order: id, label."""
+    return cached_df(*day_slots_query(day, time_range))
+
+
+def slot_groups_query(slot_id):
+    sql = """
+        SELECT g.group_name, g.notes, d.name
+        FROM groups g
+        LEFT JOIN group_members gm ON gm.slot_id = g.slot_id AND gm.group_name = g.group_name
+        LEFT JOIN dogs d ON d.id = gm.dog_id
+        WHERE g.slot_id=?
+        ORDER BY g.group_name, d.name
+        """
+    return sql, (slot_id,)
+
+
+def slot_groups(slot_id):
+    """Groups of a saved slot with their members: group_name, notes, name.
+
+    One row per member (a group with no members gets one row with a null
+    name), ordered by group then dog name, ready for a single groupby.
+    """
+    return cached_df(*slot_groups_query(slot_id))
@@ -0,0 +1,186 @@
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+
+from config import IMAGES_DIR, THUMB_CACHE_BYTES, THUMBS_DIR
+from db import connection
+
+# longest side of a stored original; phone photos are shrunk to this
+MAX_SIDE = 1600
+THUMB_SIZES = (96, 180, 360)
+JPEG_QUALITY = 85
+THUMB_QUALITY = 80
+
+_lock = threading.Lock()
+_hashes = {}
+_cache_bytes = None
+
+
+def _to_rgb(img):
+    from PIL import Image, ImageOps
+
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def save_upload(data):
+    """Decode, verify and store an uploaded photo; returns its path.
+
+    The image is rotated per its EXIF orientation, flattened to RGB, shrunk
+    to at most ``MAX_SIDE`` pixels and saved as JPEG under the hash of the
+    result, so the same photo uploaded twice is stored once. Raises
+    ValueError if the bytes are not an image Pillow can read.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            probe.verify()
+        with Image.open(io.BytesIO(data)) as img:
+            img = _to_rgb(img)
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"Not a readable image: {exc}") from exc
+    img.thumbnail((MAX_SIDE, MAX_SIDE), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    data = out.getvalue()
+    digest = hashlib.sha256(data).hexdigest()[:24]
+    path = os.path.join(IMAGES_DIR, f"{digest}.jpg")
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    with _lock:
+        _hashes[path] = (_stat_key(path), digest)
+    return path
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def content_hash(path):
+    """Hash of a photo's bytes, recomputed only when its mtime or size changes."""
+    key = _stat_key(path)
+    with _lock:
+        known = _hashes.get(path)
+    if known and known[0] == key:
+        return known[1]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()[:24]
+    with _lock:
+        _hashes[path] = (key, digest)
+    return digest
+
+
+def _thumb_files():
+    return [p for p in Path(THUMBS_DIR).glob("*.jpg") if p.is_file()]
+
+
+def _evict(limit, keep):
+    """Drop least recently served thumbnails until the cache fits in ``limit`` bytes.
+
+    ``keep`` (the thumbnail being served) is never dropped.
+    """
+    global _cache_bytes
+    files = sorted(_thumb_files(), key=lambda p: p.stat().st_mtime_ns)
+    total = sum(p.stat().st_size for p in files)
+    for p in files:
+        if total <= limit:
+            break
+        if str(p) == keep:
+            continue
+        size = p.stat().st_size
+        p.unlink(missing_ok=True)
+        total -= size
+    _cache_bytes = total
+
+
+def thumbnail(path, size=180):
+    """Path of a JPEG thumbnail of ``path`` no larger than ``size`` pixels.
+
+    Thumbnails live in ``THUMBS_DIR`` named by the original's content hash,
+    so an edited or replaced photo never serves a stale one. Serving a
+    thumbnail marks it recently used; the cache is trimmed to
+    ``THUMB_CACHE_BYTES`` least recently used first. Returns None when the
+    original is missing or unreadable.
+    """
+    global _cache_bytes
+    if size not in THUMB_SIZES:
+        size = min(THUMB_SIZES, key=lambda s: abs(s - size))
+    if not path or not os.path.exists(path):
+        return None
+    thumb = os.path.join(THUMBS_DIR, f"{content_hash(path)}_{size}.jpg")
+    if os.path.exists(thumb):
+        os.utime(thumb)
+        return thumb
+    # Pillow is imported on first use; serving cached thumbnails never needs it
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as img:
+            # JPEGs decode straight at a reduced scale, close to the target size
+            img.draft("RGB", (size, size))
+            img = _to_rgb(img)
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        return None
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=THUMB_QUALITY, optimize=True)
+    _write_atomic(thumb, out.getvalue())
+    with _lock:
+        if _cache_bytes is None:
+            _evict(THUMB_CACHE_BYTES, thumb)
+        else:
+            _cache_bytes += out.tell()
+            if _cache_bytes > THUMB_CACHE_BYTES:
+                _evict(THUMB_CACHE_BYTES, thumb)
+    return thumb
+
+
+def discard_unused(paths):
+    """Delete stored originals in ``paths`` that no dog points at any more.
+
+    Their cached thumbnails go with them. Only files directly inside
+    ``IMAGES_DIR`` are ever removed.
+    """
+    global _cache_bytes
+    images_dir = Path(IMAGES_DIR).resolve()
+    with connection() as conn:
+        for path in {p for p in paths if p}:
+            if conn.execute("SELECT 1 FROM dogs WHERE photo_path=? LIMIT 1", (path,)).fetchone():
+                continue
+            if Path(path).resolve().parent != images_dir:
+                continue
+            try:
+                digest = content_hash(path)
+                os.remove(path)
+            except OSError:
+                continue
+            with _lock:
+                _hashes.pop(path, None)
+                for size in THUMB_SIZES:
+                    thumb = Path(THUMBS_DIR) / f"{digest}_{size}.jpg"
+                    try:
+                        freed = thumb.stat().st_size
+                        thumb.unlink()
+                    except OSError:
+                        continue
+                    if _cache_bytes is not None:
+                        _cache_bytes -= freed
@@ -0,0 +1,285 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from db import connection, write_with_retry
+from relationships import upsert_relationships
+
+TRUE_VALUES = frozenset({
+    "1", "true", "t", "yes", "y", "on", "enable", "enabled", "active", "checked", "x", "✔", "✓",
+})
+SIZES = ("S", "M", "L")
+
+
+def normalize_columns(df):
+    """Lower-case column names with spaces and dashes turned into underscores."""
+    return df.rename(columns={
+        c: str(c).strip().lower().replace(" ", "_").replace("-", "_") for c in df.columns
+    })
+
+
+def as_bool_series(series, index):
+    """Vectorized boolean parsing for an imported column.
+
+    Missing columns and blank cells are False. Numeric columns are true when
+    the integer part is non-zero; text columns are true for the spellings in
+    ``TRUE_VALUES`` and false for anything else.
+    """
+    if series is None:
+        return pd.Series(False, index=index)
+    if pd.api.types.is_bool_dtype(series):
+        return series.fillna(False).astype(bool)
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            truthy = np.isfinite(values) & (np.trunc(values) != 0)
+        return pd.Series(truthy, index=index)
+    text = series.astype("string").str.strip().str.lower()
+    return text.isin(TRUE_VALUES).fillna(False).astype(bool)
+
+
+def _text(df, column, default=""):
+    """Stripped text column with blanks for missing cells (or a default column)."""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype="string")
+    return df[column].astype("string").str.strip().fillna("")
+
+
+def import_dogs(df):
+    """Upsert dogs from an imported table in one transaction.
+
+    Expects normalized column names (see ``normalize_columns``): name, size,
+    plays_hard, shy, intact, notes and optionally temperament, which wins over
+    the plays_hard/shy flags when filled in. Rows without a name, or marked
+    both plays hard and shy, are skipped. Existing names are updated, and
+    their photo is kept.
+
+    Returns ``{"added", "updated", "skipped", "errors"}``; a name repeated in
+    the file counts as added once and updated after that, as if the rows were
+    applied one by one.
+    """
+    if df.empty:
+        return {"added": 0, "updated": 0, "skipped": 0, "errors": []}
+
+    # messages number rows like the old row-by-row importer did: index label + 1
+    labels = df.index + 1 if pd.api.types.is_integer_dtype(df.index) else np.arange(1, len(df) + 1)
+    row_no = pd.Series(labels, index=df.index).astype(str)
+
+    names = _text(df, "name")
+    missing = names == ""
+
+    temperament = _text(df, "temperament").str.lower()
+    has_temperament = temperament != ""
+    plays_hard = as_bool_series(df.get("plays_hard"), df.index)
+    shy = as_bool_series(df.get("shy"), df.index)
+    plays_hard = plays_hard.where(~has_temperament, temperament == "plays hard").astype(bool)
+    shy = shy.where(~has_temperament, temperament == "shy").astype(bool)
+    conflict = ~missing & plays_hard & shy
+
+    intact = as_bool_series(df.get("intact"), df.index)
+    size = _text(df, "size", "M").str.upper()
+    size = size.where(size.isin(SIZES), "M")
+    if "notes" in df.columns:
+        notes = df["notes"].astype(object).where(df["notes"].notna(), None)
+    else:
+        notes = pd.Series(None, index=df.index, dtype=object)
+
+    errors = pd.concat([
+        ("Row " + row_no[missing] + ": missing name"),
+        ("Row " + row_no[conflict] + " (" + names[conflict] + "): cannot be both plays_hard and shy"),
+    ])
+    errors = errors.iloc[np.argsort(df.index.get_indexer(errors.index), kind="stable")]
+
+    valid = ~missing & ~conflict
+    rows = list(zip(
+        names[valid].tolist(),
+        plays_hard[valid].astype(int).tolist(),
+        shy[valid].astype(int).tolist(),
+        intact[valid].astype(int).tolist(),
+        size[valid].tolist(),
+        notes[valid].tolist(),
+    ))
+
+    with connection() as conn:
+        existing = {r[0] for r in conn.execute("SELECT name FROM dogs")}
+    valid_names = names[valid]
+    added = int((~valid_names.isin(existing) & ~valid_names.duplicated()).sum())
+
+    write_with_retry(lambda conn: conn.executemany(
+        """
+        INSERT INTO dogs(name, plays_hard, shy, intact, size, notes, photo_path)
+        VALUES(?,?,?,?,?,?,NULL)
+        ON CONFLICT(name) DO UPDATE SET
+          plays_hard=excluded.plays_hard,
+          shy=excluded.shy,
+          intact=excluded.intact,
+          size=excluded.size,
+          notes=excluded.notes,
+          photo_path=COALESCE(excluded.photo_path, dogs.photo_path)
+        """,
+        rows,
+    ), tables=("dogs",))
+    return {
+        "added": added,
+        "updated": len(rows) - added,
+        "skipped": int((~valid).sum()),
+        "errors": errors.tolist(),
+    }
+
+
+STATUS_ALIASES = {
+    "friend": "friend",
+    "friends": "friend",
+    "foe": "foe",
+    "enemy": "foe",
+    "unknown": "unknown",
+    "unsure": "unknown",
+}
+RELATIONSHIP_COLUMNS = ("dog_a", "dog_b", "status")
+RELATIONSHIP_CHUNK = 50_000
+# only the first messages are kept so memory stays flat on huge files
+MAX_MESSAGES = 200
+
+
+def _dog_index():
+    with connection() as conn:
+        rows = conn.execute("SELECT lower(name), id FROM dogs").fetchall()
+    return dict(rows)
+
+
+def _relationship_chunk(chunk, id_by_name):
+    """Validate one chunk; returns (valid rows frame, skipped-row messages)."""
+    row_no = pd.Series(chunk.index + 1, index=chunk.index).astype(str)
+    # blank cells read as "nan", as str() rendered them in the row-by-row
+    # importer; only a name of nothing but spaces counts as missing
+    name_a = chunk["dog_a"].astype("string").fillna("nan").str.strip()
+    name_b = chunk["dog_b"].astype("string").fillna("nan").str.strip()
+    status = chunk["status"].astype("string").str.strip().str.lower().map(STATUS_ALIASES)
+    ida = name_a.str.lower().map(id_by_name)
+    idb = name_b.str.lower().map(id_by_name)
+
+    missing = (name_a == "") | (name_b == "")
+    same = ~missing & (name_a.str.lower() == name_b.str.lower())
+    bad_status = ~missing & ~same & status.isna()
+    unknown_dog = ~missing & ~same & ~bad_status & (ida.isna() | idb.isna())
+    pair = " (" + name_a + " ↔ " + name_b + ")"
+    raw_status = chunk["status"].astype("string").fillna("nan")
+    messages = pd.concat([
+        "Row " + row_no[missing] + ": missing dog name(s)",
+        "Row " + row_no[same] + " (" + name_a[same] + "): cannot relate dog to itself",
+        "Row " + row_no[bad_status] + pair[bad_status] + ": invalid status '" + raw_status[bad_status] + "'",
+        "Row " + row_no[unknown_dog] + pair[unknown_dog] + ": dog not found in database",
+    ]).sort_index(kind="stable")
+
+    valid = ~(missing | same | bad_status | unknown_dog)
+    a = ida[valid].astype(np.int64).to_numpy()
+    b = idb[valid].astype(np.int64).to_numpy()
+    rows = pd.DataFrame(
+        {"a": np.minimum(a, b), "b": np.maximum(a, b), "status": status[valid].astype(str).to_numpy()},
+        index=chunk.index[valid],
+    )
+    return rows, messages
+
+
+def _upsert_relationship_rows(conn, rows):
+    """Upsert one chunk; returns (created, changed, unchanged) as if applied row by row."""
+    keys = rows[["a", "b"]].drop_duplicates()
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS import_keys(a INTEGER, b INTEGER, PRIMARY KEY(a, b)) WITHOUT ROWID"
+    )
+    conn.execute("DELETE FROM import_keys")
+    conn.executemany("INSERT INTO import_keys(a, b) VALUES(?,?)", keys.itertuples(index=False, name=None))
+    stored = pd.DataFrame(
+        conn.execute(
+            "SELECT r.dog_a_id, r.dog_b_id, r.status FROM import_keys k "
+            "JOIN relationships r ON r.dog_a_id = k.a AND r.dog_b_id = k.b"
+        ).fetchall(),
+        columns=["a", "b", "stored"],
+    )
+
+    # a repeated pair compares with its previous row in the file, the first one with the db
+    previous = rows.groupby(["a", "b"], sort=False)["status"].shift(1)
+    merged = rows.reset_index(drop=True).merge(stored, on=["a", "b"], how="left")
+    previous = previous.reset_index(drop=True).fillna(merged["stored"])
+    created = int(previous.isna().sum())
+    unchanged = int((previous == merged["status"]).sum())
+
+    final = rows.drop_duplicates(["a", "b"], keep="last")
+    conn.executemany(
+        "INSERT INTO relationships(dog_a_id,dog_b_id,status) VALUES(?,?,?) "
+        "ON CONFLICT(dog_a_id,dog_b_id) DO UPDATE SET status=excluded.status",
+        final[["a", "b", "status"]].itertuples(index=False, name=None),
+    )
+    return created, len(rows) - created - unchanged, unchanged
+
+
+def import_relationships(source, chunksize=RELATIONSHIP_CHUNK, progress=None):
+    """Stream a dog_a, dog_b, status CSV into the relationships table.
+
+    The file is read ``chunksize`` rows at a time, names are resolved through
+    a case-insensitive name-to-id index built once, and each chunk is upserted
+    with one executemany in its own transaction, so memory stays bounded by
+    the chunk size however long the file is. ``progress(rows_done, elapsed)``
+    is called after every chunk.
+
+    Raises ValueError if a required column is missing. Returns counts of
+    created, changed, unchanged and skipped rows, the first ``MAX_MESSAGES``
+    skip messages, and throughput.
+    """
+    start = time.perf_counter()
+    id_by_name = _dog_index()
+    totals = {"created": 0, "changed": 0, "unchanged": 0, "skipped": 0}
+    errors = []
+    rows_done = 0
+
+    reader = pd.read_csv(source, chunksize=chunksize, dtype=str)
+    for chunk in reader:
+        chunk = normalize_columns(chunk)
+        missing = [c for c in RELATIONSHIP_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"CSV missing required column(s): {', '.join(sorted(missing))}")
+
+        rows, messages = _relationship_chunk(chunk, id_by_name)
+        totals["skipped"] += len(messages)
+        if len(errors) < MAX_MESSAGES:
+            errors.extend(messages.iloc[:MAX_MESSAGES - len(errors)].tolist())
+        if not rows.empty:
+            created, changed, unchanged = write_with_retry(
+                lambda conn: _upsert_relationship_rows(conn, rows), tables=("relationships",)
+            )
+            totals["created"] += created
+            totals["changed"] += changed
+            totals["unchanged"] += unchanged
+
+        rows_done += len(chunk)
+        if progress is not None:
+            progress(rows_done, time.perf_counter() - start)
+
+    elapsed = time.perf_counter() - start
+    totals.update(
+        errors=errors,
+        rows=rows_done,
+        elapsed=elapsed,
+        rows_per_sec=rows_done / elapsed if elapsed > 0 else 0.0,
+    )
+    return totals
+
+
+DEMO_DOGS = ("Callie", "Merle", "Archie", "Ryder", "Pickles")
+DEMO_RELATIONSHIPS = (
+    ("Callie", "Archie", "friend"),
+    ("Callie", "Merle", "friend"),
+    ("Archie", "Merle", "friend"),
+    ("Ryder", "Pickles", "friend"),
+    ("Ryder", "Merle", "foe"),
+)
+
+
+def seed_demo_dogs():
+    """Add a handful of demo dogs, if missing, and their relationships."""
+    write_with_retry(lambda conn: conn.executemany(
+        "INSERT OR IGNORE INTO dogs(name) VALUES(?)", [(n,) for n in DEMO_DOGS]
+    ), tables=("dogs",))
+    ids = _dog_index()
+    upsert_relationships((ids[a.lower()], ids[b.lower()], status) for a, b, status in DEMO_RELATIONSHIPS)
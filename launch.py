@@ -1,15 +1,24 @@
 # launch.py — fully self-contained, no user steps required
+import multiprocessing
 import os
 import sys
 import os.path as p
-import webbrowser
 from pathlib import Path
 
+# grouping can fan out to worker processes; frozen builds must hand those off here
+multiprocessing.freeze_support()
+
 BASE = getattr(sys, "_MEIPASS", p.abspath(p.dirname(__file__)))
 APP = p.join(BASE, "app.py")
 CFG = p.join(BASE, "streamlit_config.toml")
 
-log_dir = Path.home() / "Documents" / "DogPlaygroupsData" / "logs"
+# the app's modules sit next to app.py; importing them here shares them with the Streamlit run
+sys.path.insert(0, BASE)
+os.environ.setdefault("DOG_PLAYGROUPS_STARTUP", "fast")
+import startup  # noqa: E402  (starts the startup clock)
+from config import LOG_DIR  # noqa: E402
+
+log_dir = Path(LOG_DIR)
 log_dir.mkdir(parents=True, exist_ok=True)
 log_file = log_dir / "launch.log"
 log_handle = open(log_file, "a", encoding="utf-8", buffering=1)
@@ -21,6 +30,10 @@ print("BASE:", BASE)
 print("APP exists:", p.exists(APP))
 print("CFG exists:", p.exists(CFG))
 print("Python:", sys.version)
+print("Startup mode:", startup.mode())
+
+# init_db, heavy imports and the first cache fills overlap the Streamlit import below
+startup.warm_in_background()
 
 usr_streamlit = Path.home() / ".streamlit"
 usr_streamlit.mkdir(parents=True, exist_ok=True)
@@ -46,7 +59,8 @@ os.environ.pop("STREAMLIT_SERVER_PORT", None)
 os.environ["STREAMLIT_GLOBAL_DEVELOPMENTMODE"] = "false"
 os.environ["STREAMLIT_BROWSER_GATHER_USAGE_STATS"] = "false"
 
-from streamlit.web.cli import main as st_main
+with startup.phase("import_streamlit"):
+    from streamlit.web.cli import main as st_main
 sys.argv = ["streamlit", "run", APP]
 print("Args:", sys.argv)
 
@@ -0,0 +1,206 @@
+"""Opt-in timing spans, per-rerun query counts and cProfile capture.
+
+Off by default: set ``DOG_PLAYGROUPS_PERF=1`` or call ``enable()``. While
+off, ``span`` hands back one shared do-nothing context manager and ``timed``
+functions cost one flag check, so the hooks can stay on hot paths.
+
+A trace covers one unit of work, normally one Streamlit rerun, on the
+thread that started it. Spans opened on that thread add to it; work on
+other threads (solver processes, the API's pool) is not attributed. Each
+finished trace is kept in memory for the admin panel and appended as one
+JSON line to ``LOG_DIR/perf.jsonl``.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import LOG_DIR
+
+RECENT_TRACES = 50
+PROFILE_LINES = 40
+LOG_FILE = Path(LOG_DIR) / "perf.jsonl"
+
+_enabled = os.environ.get("DOG_PLAYGROUPS_PERF") == "1"
+_local = threading.local()
+_recent = deque(maxlen=RECENT_TRACES)
+_log_lock = threading.Lock()
+
+
+class Trace:
+    """Timings and query counts collected during one rerun."""
+
+    def __init__(self, label, profile=False):
+        self.label = label
+        self.started = time.time()
+        self.seconds = None
+        self.spans = {}  # name -> [calls, seconds]
+        self.queries = 0
+        self.rows = 0
+        self.statements = 0
+        self.checkouts = 0
+        self.profile = None
+        self._start = time.perf_counter()
+        self._profiler = None
+        if profile:
+            # pstats pulls in inspect and dataclasses; only load them when asked to profile
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+
+    def add(self, name, seconds):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def statement(self, sql):
+        self.statements += 1
+
+    def as_dict(self):
+        return {
+            "label": self.label,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "ms": round((self.seconds or 0.0) * 1000, 3),
+            "queries": self.queries,
+            "rows": self.rows,
+            "statements": self.statements,
+            "checkouts": self.checkouts,
+            "spans": {
+                name: {"calls": calls, "ms": round(seconds * 1000, 3)}
+                for name, (calls, seconds) in sorted(self.spans.items(), key=lambda kv: -kv[1][1])
+            },
+        }
+
+
+class _Span:
+    __slots__ = ("name", "trace", "start")
+
+    def __init__(self, name, trace):
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """Turn tracing on or off for the whole process."""
+    global _enabled
+    _enabled = bool(on)
+
+
+def current():
+    """The trace being recorded on this thread, or None."""
+    if not _enabled:
+        return None
+    return getattr(_local, "trace", None)
+
+
+def span(name):
+    """``with span("phase"):`` adds the block's time to the current trace."""
+    if not _enabled:
+        return _NO_SPAN
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return _NO_SPAN
+    return _Span(name, trace)
+
+
+def timed(name):
+    """Decorator form of ``span``."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def record_query(rows):
+    """Count one query returning ``rows`` rows against the current trace."""
+    trace = current()
+    if trace is not None:
+        trace.queries += 1
+        trace.rows += rows
+
+
+@contextmanager
+def trace(label, profile=False):
+    """Record everything on this thread inside the block as one trace.
+
+    Does nothing while tracing is off. With ``profile``, the block also runs
+    under cProfile and the top functions by cumulative time are kept.
+    """
+    if not _enabled:
+        yield None
+        return
+    t = Trace(label, profile)
+    _local.trace = t
+    if t._profiler is not None:
+        try:
+            t._profiler.enable()
+        except ValueError:  # another profiler is already running
+            t._profiler = None
+    try:
+        yield t
+    finally:
+        if t._profiler is not None:
+            import io
+            import pstats
+
+            t._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(t._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            t.profile = out.getvalue()
+            t._profiler = None
+        t.seconds = time.perf_counter() - t._start
+        _local.trace = None
+        _recent.append(t)
+        _write(t.as_dict())
+
+
+def recent():
+    """Finished traces, newest first."""
+    return list(reversed(_recent))
+
+
+def _write(record):
+    try:
+        with _log_lock:
+            LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass  # timings are best-effort; never fail a rerun over the log
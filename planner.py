@@ -0,0 +1,87 @@
+import numpy as np
+
+from analytics import CoplayMatrix
+from grouping import allowed_matrix, group_status, load_attrs
+from relationships import RelationshipMatrix
+from slots import parse_slot, slot_sort_key
+from solver import repair_partition, solve
+
+
+def rested_dogs(players, last_played_end, start_min, min_rest_minutes):
+    """Dogs whose previous slot ended less than ``min_rest_minutes`` before ``start_min``."""
+    if start_min is None or min_rest_minutes <= 0:
+        return set()
+    return {
+        d for d in players
+        if d in last_played_end and start_min - last_played_end[d] < min_rest_minutes
+    }
+
+
+def plan_day(
+    attendance, rules, target_size, min_rest_minutes=0, mode="greedy", time_budget=2.0, workers=1, seed=0,
+    prefer_familiar=False,
+):
+    """Group every slot of a day in one pass.
+
+    ``attendance`` maps slot label to the dog IDs booked into it. Slots are
+    planned in start-time order. Attributes, relationships and the allowed
+    mask are loaded once for every dog of the day, and each slot works on a
+    slice of them. The first slot is solved with ``mode`` and the same
+    settings ``suggest_groups`` takes, so it matches a single-slot
+    suggestion; each later slot starts from the previous slot's groups
+    (minus dogs who are not back) and only places the newcomers, so dogs
+    keep their playmates where the rules allow. A dog whose last play ended less than ``min_rest_minutes`` before
+    a slot starts sits that slot out and is listed under ``resting``.
+
+    Returns a list of ``{"slot", "groups", "leftovers", "resting"}`` dicts in
+    slot order, with groups shaped like ``suggest_groups`` output.
+    """
+    day_ids = list(dict.fromkeys(int(d) for ids in attendance.values() for d in ids))
+    if not day_ids:
+        return []
+    matrix = RelationshipMatrix.load(day_ids)
+    allowed = allowed_matrix(rules, load_attrs(day_ids), matrix)
+    codes = matrix.codes
+    pos, ids = matrix.pos, matrix.ids
+    plays = CoplayMatrix.load(ids).plays if prefer_familiar else None
+
+    plan = []
+    previous = []
+    last_played_end = {}
+    for label in sorted(attendance, key=slot_sort_key):
+        times = parse_slot(label)
+        start_min, end_min = times if times else (None, None)
+        booked = list(dict.fromkeys(int(d) for d in attendance[label]))
+        resting = rested_dogs(booked, last_played_end, start_min, min_rest_minutes)
+        players = [pos[d] for d in booked if d not in resting]
+        local = {p: i for i, p in enumerate(players)}
+        sub = np.ix_(players, players)
+        sub_allowed, sub_codes = allowed[sub], codes[sub]
+
+        carried = [[local[p] for p in grp if p in local] for grp in previous]
+        carried = [grp for grp in carried if len(grp) > 1]
+        if carried:
+            in_carried = {p for grp in carried for p in grp}
+            free = [i for i in range(len(players)) if i not in in_carried]
+            groups, leftovers, _ = repair_partition(carried, free, sub_allowed, sub_codes, target_size)
+        else:
+            groups, leftovers = solve(
+                sub_allowed, sub_codes, target_size, mode=mode, time_budget=time_budget,
+                workers=workers, seed=seed, tie_break=None if plays is None else plays[sub],
+            )
+
+        previous = [[players[i] for i in grp] for grp in groups]
+        if end_min is not None:
+            for grp in previous:
+                for p in grp:
+                    last_played_end[ids[p]] = end_min
+        plan.append({
+            "slot": label,
+            "groups": [
+                {"dogs": [ids[p] for p in grp], "status": group_status(codes, grp)}
+                for grp in previous
+            ],
+            "leftovers": [ids[players[i]] for i in leftovers],
+            "resting": sorted(resting),
+        })
+    return plan
@@ -1,24 +1,210 @@
-from db import get_conn
+import numpy as np
+
+import perf
+from cache import cached
+from db import connection, write_with_retry
+
+UNKNOWN, FRIEND, FOE = 0, 1, 2
+STATUS_NAMES = ("unknown", "friend", "foe")
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+# keep each IN (...) list well under SQLite's bound-parameter limit
+ID_CHUNK = 500
 
 def upsert_relationship(a_id, b_id, status):
     if a_id == b_id:
         return
     a, b = sorted([a_id, b_id])
-    conn = get_conn()
-    conn.execute(
+    write_with_retry(lambda conn: conn.execute(
         "INSERT INTO relationships(dog_a_id,dog_b_id,status) VALUES(?,?,?) "
         "ON CONFLICT(dog_a_id,dog_b_id) DO UPDATE SET status=excluded.status",
         (a, b, status)
-    )
-    conn.commit()
+    ), tables=("relationships",))
+
+def upsert_relationships(rows):
+    """Upsert many (a_id, b_id, status) rows in one transaction; returns how many were written.
 
+    Pairs may come in either order; self-pairs are skipped and a pair
+    repeated in ``rows`` keeps its last status. Raises ValueError on an
+    unknown status.
+    """
+    latest = {}
+    for a_id, b_id, status in rows:
+        if status not in STATUS_CODES:
+            raise ValueError(f"Invalid status {status!r} for pair ({a_id}, {b_id})")
+        a, b = sorted((int(a_id), int(b_id)))
+        if a != b:
+            latest[(a, b)] = status
+    if latest:
+        write_with_retry(lambda conn: conn.executemany(
+            "INSERT INTO relationships(dog_a_id,dog_b_id,status) VALUES(?,?,?) "
+            "ON CONFLICT(dog_a_id,dog_b_id) DO UPDATE SET status=excluded.status",
+            [(a, b, status) for (a, b), status in latest.items()],
+        ), tables=("relationships",))
+    return len(latest)
+
+@perf.timed("get_relationship")
 def get_relationship(a_id, b_id):
     if a_id == b_id:
         return "friend"
     a, b = sorted([a_id, b_id])
-    cur = get_conn().execute(
-        "SELECT status FROM relationships WHERE dog_a_id=? AND dog_b_id=?",
-        (a, b)
-    )
-    row = cur.fetchone()
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT status FROM relationships WHERE dog_a_id=? AND dog_b_id=?",
+            (a, b)
+        ).fetchone()
     return row[0] if row else "unknown"
+
+
+def pair_positions(ids, a, b):
+    """Positions in ``ids`` of the ID pairs ``(a[k], b[k])``.
+
+    Pairs with an ID outside ``ids`` are dropped; returns (pa, pb, keep)
+    where ``keep`` marks the pairs that were kept.
+    """
+    id_arr = np.array(ids, dtype=np.int64)
+    order = np.argsort(id_arr)
+    sorted_ids = id_arr[order]
+    last = len(ids) - 1
+    ia = np.searchsorted(sorted_ids, a).clip(max=last)
+    ib = np.searchsorted(sorted_ids, b).clip(max=last)
+    keep = (sorted_ids[ia] == a) & (sorted_ids[ib] == b)
+    return order[ia[keep]], order[ib[keep]], keep
+
+
+class RelationshipMatrix:
+    """Dense status matrix for a fixed set of dogs, loaded in one pass.
+
+    ``codes[i, j]`` holds UNKNOWN/FRIEND/FOE for the dogs at positions i and j
+    of ``ids``; a dog is its own friend, matching ``get_relationship``.
+    """
+
+    def __init__(self, ids, codes):
+        self.ids = list(ids)
+        self.pos = {did: i for i, did in enumerate(self.ids)}
+        self.codes = codes
+
+    @classmethod
+    def load(cls, dog_ids, focus=None):
+        """Load statuses among ``dog_ids``.
+
+        With ``focus``, only pairs involving at least one focus dog are read;
+        every other pair is left as UNKNOWN, so callers must only look those up.
+        """
+        ids = list(dict.fromkeys(int(d) for d in dog_ids))
+        n = len(ids)
+        codes = np.zeros((n, n), dtype=np.int8)
+        np.fill_diagonal(codes, FRIEND)
+        if n < 2:
+            return cls(ids, codes)
+
+        select = (
+            "SELECT dog_a_id, dog_b_id, "
+            "CASE status WHEN 'friend' THEN 1 WHEN 'foe' THEN 2 ELSE 0 END "
+            "FROM relationships WHERE "
+        )
+        rows = []
+        with connection() as conn:
+            if focus is None:
+                for start in range(0, n, ID_CHUNK):
+                    chunk = ids[start:start + ID_CHUNK]
+                    rows.extend(conn.execute(
+                        select + "dog_a_id IN ({})".format(",".join("?" * len(chunk))), chunk
+                    ).fetchall())
+            else:
+                focus = list(dict.fromkeys(int(d) for d in focus))
+                for start in range(0, len(focus), ID_CHUNK):
+                    chunk = focus[start:start + ID_CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    rows.extend(conn.execute(
+                        select + f"dog_a_id IN ({marks}) OR dog_b_id IN ({marks})", chunk + chunk
+                    ).fetchall())
+        if rows:
+            pairs = np.array(rows, dtype=np.int64)
+            pa, pb, keep = pair_positions(ids, pairs[:, 0], pairs[:, 1])
+            vals = pairs[keep, 2].astype(np.int8)
+            codes[pa, pb] = vals
+            codes[pb, pa] = vals
+        return cls(ids, codes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, dog_id):
+        return dog_id in self.pos
+
+    def code(self, a_id, b_id):
+        return int(self.codes[self.pos[a_id], self.pos[b_id]])
+
+    def status(self, a_id, b_id):
+        return STATUS_NAMES[self.codes[self.pos[a_id], self.pos[b_id]]]
+
+    def pairs_with(self, code):
+        """(a_id, b_id) pairs with the given status, in ``combinations(ids, 2)`` order."""
+        ii, jj = np.nonzero(np.triu(self.codes == code, k=1))
+        return [(self.ids[i], self.ids[j]) for i, j in zip(ii.tolist(), jj.tolist())]
+
+
+class UnknownPairs:
+    """Unknown pairs among ``dog_ids``, counted in bulk and listed page by page.
+
+    Only the known (friend/foe) pairs are read, in one query. Pair (i, j) of
+    positions is unknown unless it is known, so each row i of the upper
+    triangle has ``n - 1 - i`` pairs minus its known ones; prefix sums of those
+    counts give the total and let ``page`` jump straight to any offset.
+    Pairs come out in ``combinations(dog_ids, 2)`` order.
+    """
+
+    def __init__(self, dog_ids):
+        self.ids = list(dict.fromkeys(int(d) for d in dog_ids))
+        n = len(self.ids)
+        with connection() as conn:
+            rows = conn.execute(
+                "SELECT dog_a_id, dog_b_id FROM relationships WHERE status IN ('friend', 'foe')"
+            ).fetchall()
+
+        lo = hi = np.zeros(0, dtype=np.int64)
+        if rows and n > 1:
+            pairs = np.array(rows, dtype=np.int64)
+            pa, pb, _ = pair_positions(self.ids, pairs[:, 0], pairs[:, 1])
+            flat = np.unique(np.minimum(pa, pb) * n + np.maximum(pa, pb))
+            lo, hi = np.divmod(flat, n)
+
+        self._known_hi = hi
+        self._known_start = np.searchsorted(lo, np.arange(n + 1))
+        per_row = (n - 1 - np.arange(n)) - np.diff(self._known_start)
+        self._row_start = np.concatenate([[0], np.cumsum(per_row)]).astype(np.int64)
+        self.total = int(self._row_start[-1])
+
+    def __len__(self):
+        return self.total
+
+    def _row(self, i):
+        known = self._known_hi[self._known_start[i]:self._known_start[i + 1]]
+        cols = np.arange(i + 1, len(self.ids))
+        return cols[~np.isin(cols, known, assume_unique=True)]
+
+    def page(self, offset, limit):
+        """Up to ``limit`` (a_id, b_id) pairs starting at the ``offset``-th unknown pair."""
+        if offset >= self.total or limit <= 0:
+            return []
+        i = int(np.searchsorted(self._row_start, offset, side="right")) - 1
+        skip = offset - int(self._row_start[i])
+        out = []
+        while i < len(self.ids) - 1 and len(out) < limit:
+            cols = self._row(i)[skip:skip + limit - len(out)]
+            out.extend((self.ids[i], self.ids[j]) for j in cols.tolist())
+            skip = 0
+            i += 1
+        return out
+
+    def __iter__(self):
+        for i in range(len(self.ids) - 1):
+            for j in self._row(i).tolist():
+                yield self.ids[i], self.ids[j]
+
+
+def get_unknown_pairs(dog_ids):
+    """The shared ``UnknownPairs`` for ``dog_ids``, rebuilt after dogs or relationships change."""
+    dog_ids = tuple(dog_ids)
+    return cached(("unknown_pairs", dog_ids), ("dogs", "relationships"), lambda: UnknownPairs(dog_ids))
@@ -0,0 +1,44 @@
+from cache import cached
+from db import fetch_df
+
+
+class Roster:
+    """Every dog, indexed by ID, built once per version of the dogs table.
+
+    ``ids`` is in name order, ready for selectbox options; ``name`` and
+    ``record`` are dict/index lookups, so a widget with n options costs
+    O(n) to render instead of a DataFrame scan per option.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.ids = df["id"].tolist()
+        self.names = dict(zip(self.ids, df["name"].tolist()))
+        self._records = df.set_index("id", drop=False)
+
+    @classmethod
+    def load(cls):
+        return cls(fetch_df(
+            "SELECT id, name, size, plays_hard, shy, intact, notes, photo_path FROM dogs ORDER BY name"
+        ))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, dog_id):
+        return dog_id in self.names
+
+    def name(self, dog_id):
+        return self.names.get(dog_id, str(dog_id))
+
+    def names_for(self, dog_ids):
+        return [self.name(d) for d in dog_ids]
+
+    def record(self, dog_id):
+        """The dog's row as a Series: id, name, size, plays_hard, shy, intact, notes, photo_path."""
+        return self._records.loc[dog_id]
+
+
+def get_roster():
+    """The shared Roster, rebuilt only after a write to the dogs table."""
+    return cached(("roster",), ("dogs",), Roster.load)
@@ -0,0 +1,88 @@
+"""Check and time the vectorized compatibility mask against ``allowed_pair``.
+
+For each roster size, builds random dog attributes and relationships, checks
+that ``grouping.allowed_matrix`` agrees with ``grouping.allowed_pair`` on
+every pair under every rule combination, and times both.
+
+    python scripts/bench_allowed.py --sizes 50 200 1000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grouping import allowed_matrix, allowed_pair  # noqa: E402
+from relationships import STATUS_NAMES, RelationshipMatrix  # noqa: E402
+from solver import greedy_partition  # noqa: E402
+
+RULE_KEYS = ("allow_unknown", "separate_hard_shy", "separate_intact", "same_size_only")
+
+
+def random_roster(n, rng):
+    ids = rng.sample(range(1, n * 10), n)
+    attrs = {}
+    for did in ids:
+        temperament = rng.choice(["neither", "hard", "shy"])
+        attrs[did] = (
+            temperament == "hard", temperament == "shy", rng.random() < 0.3, rng.choice("SML")
+        )
+    codes = np.zeros((n, n), dtype=np.int8)
+    np.fill_diagonal(codes, 1)
+    iu = np.triu_indices(n, k=1)
+    vals = np.array(rng.choices([0, 1, 2], weights=[6, 3, 1], k=len(iu[0])), dtype=np.int8)
+    codes[iu] = vals
+    codes[iu[1], iu[0]] = vals
+    return attrs, RelationshipMatrix(ids, codes)
+
+
+def python_mask(rules, attrs, matrix):
+    ids = matrix.ids
+    return np.array([
+        [allowed_pair(a, b, rules, STATUS_NAMES[matrix.codes[i, j]], attrs) for j, b in enumerate(ids)]
+        for i, a in enumerate(ids)
+    ])
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    print(f"{'dogs':>6} {'python ms':>11} {'numpy ms':>10} {'speedup':>8} {'greedy ms':>10}")
+    for n in args.sizes:
+        attrs, matrix = random_roster(n, rng)
+        for flags in itertools.product([False, True], repeat=len(RULE_KEYS)):
+            rules = dict(zip(RULE_KEYS, flags))
+            if not np.array_equal(python_mask(rules, attrs, matrix), allowed_matrix(rules, attrs, matrix)):
+                print(f"MISMATCH at n={n} rules={rules}")
+                return 1
+
+        rules = dict(allow_unknown=True, separate_hard_shy=True, separate_intact=True, same_size_only=False)
+        slow = best_time(lambda: python_mask(rules, attrs, matrix), args.repeat)
+        fast = best_time(lambda: allowed_matrix(rules, attrs, matrix), args.repeat)
+        allowed = allowed_matrix(rules, attrs, matrix)
+        greedy = best_time(lambda: greedy_partition(allowed, matrix.codes, 4), args.repeat)
+        print(f"{n:>6} {slow * 1000:>11.1f} {fast * 1000:>10.2f} {slow / fast:>7.0f}x {greedy * 1000:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
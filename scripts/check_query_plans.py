@@ -0,0 +1,122 @@
+"""Assert that the app's hot queries are answered from an index.
+
+Builds a throwaway database at the current schema version, fills it with
+enough rows for the planner to care, and runs EXPLAIN QUERY PLAN on every
+query in HOT_QUERIES. A plan step that scans a table without an index fails
+the check; scans of a query's own CTEs are fine, since those are built from
+rows the query already searched for. The History queries are taken from
+``history`` itself, so the check follows any change to them.
+
+    python scripts/check_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+
+os.environ["DOG_PLAYGROUPS_DATA_DIR"] = tempfile.mkdtemp(prefix="dogs_plans_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import history  # noqa: E402
+
+CTE_RE = re.compile(r"(?:\bWITH|,)\s*([A-Za-z_]\w*)\s+AS\s*\(", re.IGNORECASE)
+SOURCE_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?", re.IGNORECASE)
+NOT_ALIAS = {"where", "on", "join", "left", "inner", "cross", "natural", "group", "order", "limit", "using"}
+
+HOT_QUERIES = {
+    "roster by name": ("SELECT id, name FROM dogs ORDER BY name", ()),
+    "pair status": (
+        "SELECT status FROM relationships WHERE dog_a_id=? AND dog_b_id=?", (1, 2)
+    ),
+    "relationships by status": (
+        "SELECT dog_a_id, dog_b_id FROM relationships WHERE status=? ORDER BY id", ("friend",)
+    ),
+    "known pairs": (
+        "SELECT dog_a_id, dog_b_id FROM relationships WHERE status IN ('friend', 'foe')", ()
+    ),
+    "relationships touching a dog": (
+        "SELECT dog_a_id, dog_b_id, status FROM relationships WHERE dog_a_id IN (?) OR dog_b_id IN (?)",
+        (1, 1),
+    ),
+    "history bounds": history.history_bounds_query(),
+    "history first page": history.day_summaries_query("2030-01-01", "2030-01-31"),
+    "history older page, mornings": history.day_summaries_query(
+        "2030-01-01", "2030-01-31", time_range=(0, 720), before="2030-01-15"
+    ),
+    "history day slots": history.day_slots_query("2030-01-02"),
+    "history slot groups": history.slot_groups_query(1),
+    "attendance by day": (
+        "SELECT s.label, a.dog_id FROM slots s JOIN attendance a ON a.slot_id = s.id "
+        "WHERE s.date=? ORDER BY s.start_min",
+        ("2030-01-01",),
+    ),
+    "attendance by dog": ("SELECT slot_id FROM attendance WHERE dog_id=?", (1,)),
+    "group history by dog": ("SELECT slot_id, group_name FROM group_members WHERE dog_id=?", (1,)),
+}
+
+
+def seed():
+    db.init_db()
+    with db.transaction() as conn:
+        conn.executemany("INSERT INTO dogs(name) VALUES(?)", [(f"Dog {i}",) for i in range(500)])
+        conn.executemany(
+            "INSERT INTO relationships(dog_a_id, dog_b_id, status) VALUES(?,?,?)",
+            [(a, b, ("friend", "foe", "unknown")[(a + b) % 3])
+             for a in range(1, 200) for b in range(a + 1, a + 20)],
+        )
+        conn.executemany(
+            "INSERT INTO slots(date, label, start_min, end_min) VALUES(?,?,?,?)",
+            [(f"2030-01-{d:02d}", label, start, end)
+             for d in range(1, 29)
+             for label, start, end in (("9:00 AM - 12:00 PM", 540, 720), ("1:00 PM - 4:00 PM", 780, 960))],
+        )
+        slot_ids = [r[0] for r in conn.execute("SELECT id FROM slots")]
+        conn.executemany(
+            "INSERT INTO attendance(slot_id, dog_id) VALUES(?,?)",
+            [(s, i) for s in slot_ids for i in range(1, 120)],
+        )
+        conn.executemany(
+            "INSERT INTO groups(slot_id, group_name, notes) VALUES(?,?,?)",
+            [(s, f"Group {g}", "Safe") for s in slot_ids for g in range(1, 30)],
+        )
+        conn.executemany(
+            "INSERT INTO group_members(slot_id, group_name, dog_id) VALUES(?,?,?)",
+            [(s, f"Group {i // 4 + 1}", i) for s in slot_ids for i in range(1, 117)],
+        )
+        conn.execute("ANALYZE")
+
+
+def derived_names(sql):
+    """Names under which ``sql`` reads its own CTEs: the CTE names and their aliases."""
+    ctes = {name.lower() for name in CTE_RE.findall(sql)}
+    names = set(ctes)
+    for source, alias in SOURCE_RE.findall(sql):
+        if source.lower() in ctes and alias and alias.lower() not in NOT_ALIAS:
+            names.add(alias.lower())
+    return names
+
+
+def full_scans(plan, sql=""):
+    derived = derived_names(sql)
+    return [
+        detail for detail in plan
+        if detail.startswith("SCAN") and "USING" not in detail and "CONSTANT ROW" not in detail
+        and detail.split()[1].lower() not in derived
+    ]
+
+
+def main():
+    seed()
+    failures = 0
+    with db.connection() as conn:
+        for name, (sql, params) in HOT_QUERIES.items():
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            bad = full_scans(plan, sql)
+            print(f"{'FAIL' if bad else 'ok  '} {name}: {' | '.join(plan)}")
+            failures += bool(bad)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
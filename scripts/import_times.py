@@ -0,0 +1,92 @@
+"""Measure import-time cost per module and check what each one drags in.
+
+Every module is imported in a fresh interpreter (best of --repeats runs)
+under ``-X importtime``; the report gives its own cumulative import time
+and whether Streamlit, pandas or Pillow came with it. Fails when an engine
+module imports Streamlit, when a module listed in LIGHT imports pandas or
+Pillow, or when importing app.py loads a page module before it is shown.
+
+    python scripts/import_times.py --repeats 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINE = (
+    "config", "slots", "perf", "db", "cache", "relationships", "solver", "cliques", "analytics",
+    "grouping", "planner", "history", "roster", "images", "importers", "startup", "api", "batch",
+)
+# engine modules that must start without pandas or Pillow (headless tools, the launcher)
+LIGHT = ("config", "slots", "perf", "db", "cache", "relationships", "solver", "cliques", "analytics",
+         "grouping", "planner", "images", "startup", "api", "batch")
+PAGES = ("app_pages.dogs", "app_pages.relationships", "app_pages.today", "app_pages.history")
+HEAVY = ("streamlit", "pandas", "PIL")
+
+PROBE = """
+import json, sys
+import {module}
+print(json.dumps({{name: name in sys.modules for name in {names!r}}}))
+"""
+
+
+def measure(module, env):
+    """(cumulative microseconds, {heavy or page module: loaded}) for one fresh import."""
+    names = HEAVY + PAGES
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, names=names)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        return None, proc.stderr.strip().splitlines()[-1]
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            cumulative = int(line.split("|")[1])
+    return cumulative, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import-time cost per module.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DOG_PLAYGROUPS_DATA_DIR=tempfile.mkdtemp(prefix="import_times_"))
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    report, failures = {}, []
+    for module in ENGINE + PAGES + ("app",):
+        runs = [measure(module, env) for _ in range(args.repeats)]
+        errors = [loaded for us, loaded in runs if us is None]
+        if errors:
+            report[module] = {"error": errors[0]}
+            print(f"{module:<26} not importable here: {errors[0]}")
+            continue
+        best = min(us for us, _ in runs)
+        loaded = runs[0][1]
+        report[module] = {"ms": round(best / 1000, 1), **{name: loaded[name] for name in HEAVY}}
+        heavy = ", ".join(name for name in HEAVY if loaded[name]) or "-"
+        print(f"{module:<26} {best / 1000:8.1f} ms   loads: {heavy}")
+
+        if module in ENGINE and loaded["streamlit"]:
+            failures.append(f"{module} imports streamlit")
+        if module in LIGHT and (loaded["pandas"] or loaded["PIL"]):
+            failures.append(f"{module} imports pandas or Pillow at import time")
+        if module == "app" and any(loaded[page] for page in PAGES):
+            failures.append("app.py imports page modules before they are shown")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    for failure in failures:
+        print("FAIL:", failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
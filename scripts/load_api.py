@@ -0,0 +1,168 @@
+"""Load test for the local JSON API (api.py).
+
+Seeds a throwaway database, starts the server on a free localhost port and
+drives it with --clients concurrent keep-alive connections sending a mix of
+suggest, relationship lookup, bulk upsert and attendance requests. Prints
+throughput and per-endpoint latency percentiles as JSON.
+
+    python scripts/load_api.py --clients 64 --seconds 10
+
+Pass --url to target a server that is already running instead; its
+database must then hold dogs with IDs 1..--dogs. Exits non-zero if any
+request failed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# endpoint -> share of requests
+MIX = {"suggest": 0.2, "lookup": 0.5, "bulk": 0.15, "attendance": 0.15}
+
+
+def seed(data_dir, dogs):
+    os.environ["DOG_PLAYGROUPS_DATA_DIR"] = data_dir
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import db
+
+    db.init_db()
+    rng = random.Random(0)
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO dogs(name, size, plays_hard, shy) VALUES(?,?,?,?)",
+            [(f"Dog {i}", rng.choice("SML"), rng.random() < 0.2, rng.random() < 0.1) for i in range(dogs)],
+        )
+        pairs = {tuple(sorted(rng.sample(range(1, dogs + 1), 2))) for _ in range(dogs * 10)}
+        conn.executemany(
+            "INSERT INTO relationships(dog_a_id, dog_b_id, status) VALUES(?,?,?)",
+            [(a, b, rng.choice(["friend", "friend", "foe"])) for a, b in pairs],
+        )
+
+
+def start_server(data_dir, workers):
+    cmd = [sys.executable, os.path.join(ROOT, "api.py"), "--port", "0", "--data-dir", data_dir]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("Serving on "):
+        proc.kill()
+        raise SystemExit(f"server failed to start: {line!r}")
+    return proc, line.split()[2]
+
+
+def make_request(kind, rng, dogs, slot_size):
+    if kind == "suggest":
+        ids = rng.sample(range(1, dogs + 1), slot_size)
+        return "POST", "/groups/suggest", {"dog_ids": ids, "target_size": 4}
+    if kind == "lookup":
+        a, b = rng.sample(range(1, dogs + 1), 2)
+        return "GET", f"/relationships?a={a}&b={b}", None
+    if kind == "bulk":
+        pairs = [
+            {"a": a, "b": b, "status": rng.choice(["friend", "foe", "unknown"])}
+            for a, b in (rng.sample(range(1, dogs + 1), 2) for _ in range(20))
+        ]
+        return "POST", "/relationships/bulk", {"pairs": pairs}
+    ids = rng.sample(range(1, dogs + 1), slot_size)
+    hour = rng.randint(7, 10)
+    return "POST", "/attendance", {
+        "date": f"2030-01-{rng.randint(1, 28):02d}", "slot": f"{hour}:00 AM - {hour + 1}:00 AM", "dog_ids": ids,
+    }
+
+
+async def client(host, port, worker, deadline, args, results):
+    rng = random.Random(worker)
+    kinds, weights = zip(*MIX.items())
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            method, path, payload = make_request(kind, rng, args.dogs, args.slot_size)
+            body = json.dumps(payload).encode() if payload is not None else b""
+            start = time.perf_counter()
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            results.append((kind, status, time.perf_counter() - start))
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run(host, port, args):
+    results = []
+    deadline = time.perf_counter() + args.seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, i, deadline, args, results) for i in range(args.clients)))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="server to test, e.g. http://127.0.0.1:8765 (default: start one)")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--dogs", type=int, default=300)
+    parser.add_argument("--slot-size", type=int, default=24, help="dogs per suggest/attendance request")
+    parser.add_argument("--workers", type=int, help="server worker threads when starting one")
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        url = args.url
+    else:
+        data_dir = tempfile.mkdtemp(prefix="load_api_")
+        seed(data_dir, args.dogs)
+        proc, url = start_server(data_dir, args.workers)
+    parts = urlsplit(url)
+    try:
+        results, elapsed = asyncio.run(run(parts.hostname, parts.port, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    report = {"clients": args.clients, "seconds": round(elapsed, 2), "requests": len(results)}
+    report["throughput_rps"] = round(len(results) / elapsed, 1)
+    report["errors"] = sum(1 for _, status, _ in results if status != 200)
+    for kind in MIX:
+        times = sorted(t for k, _, t in results if k == kind)
+        report[kind] = {
+            "count": len(times),
+            "p50_ms": round(percentile(times, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(times, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(times, 0.99) * 1000, 2),
+        }
+    print(json.dumps(report, indent=2))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Re-store existing dog photos through the image pipeline.
+
+Photos saved before the pipeline existed are raw uploads named after the
+dog. Each one is decoded, normalized and stored under its content hash like
+a new upload, the dog is pointed at the new file, and the old file is
+deleted once no dog uses it. Unreadable files are reported and left alone.
+
+    python scripts/normalize_photos.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import fetch_df, init_db, transaction  # noqa: E402
+from config import IMAGES_DIR  # noqa: E402
+from images import content_hash, discard_unused, save_upload  # noqa: E402
+
+
+def main():
+    init_db()
+    dogs = fetch_df("SELECT id, name, photo_path FROM dogs WHERE photo_path IS NOT NULL")
+    before = after = 0
+    old_paths = []
+    for did, name, path in dogs.itertuples(index=False):
+        if not os.path.exists(path):
+            print(f"missing: {name} ({path})")
+            continue
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(IMAGES_DIR) and (
+            os.path.basename(path) == f"{content_hash(path)}.jpg"
+        ):
+            continue  # already stored by the pipeline
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            new_path = save_upload(data)
+        except ValueError as exc:
+            print(f"skipped: {name}: {exc}")
+            continue
+        if new_path != path:
+            with transaction("dogs") as conn:
+                conn.execute("UPDATE dogs SET photo_path=? WHERE id=?", (new_path, int(did)))
+            old_paths.append(path)
+        before += len(data)
+        after += os.path.getsize(new_path)
+    discard_unused(old_paths)
+    print(f"{len(dogs)} photo(s): {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Multi-process stress check for the shared SQLite database.
+
+Spawns writer processes that save groups and upsert relationships in a tight
+loop, and reader processes that time every query while the writers run. In
+WAL mode readers never wait on writers, so read latency should stay flat and
+no process should see "database is locked".
+
+    python scripts/stress_wal.py --writers 4 --readers 4 --seconds 10
+
+Runs against a throwaway database in a temp directory and exits non-zero if
+a reader was blocked longer than --max-read-ms or any write failed.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOGS = 200
+
+
+def _setup(data_dir):
+    os.environ["DOG_PLAYGROUPS_DATA_DIR"] = data_dir
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def seed(data_dir):
+    _setup(data_dir)
+    import db
+
+    db.init_db()
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO dogs(name) VALUES(?)", [(f"Dog {i}",) for i in range(DOGS)]
+        )
+
+
+def writer(data_dir, worker, deadline, out):
+    _setup(data_dir)
+    import db
+    from grouping import save_groups
+    from relationships import upsert_relationship
+
+    rng = random.Random(worker)
+    commits = errors = 0
+    while time.time() < deadline:
+        try:
+            if rng.random() < 0.5:
+                a, b = rng.sample(range(1, DOGS + 1), 2)
+                upsert_relationship(a, b, rng.choice(["friend", "foe", "unknown"]))
+            else:
+                dogs = rng.sample(range(1, DOGS + 1), 12)
+                groups = [{"dogs": dogs[i:i + 4], "status": "Safe"} for i in range(0, 12, 4)]
+                save_groups(groups, dogs, "2030-01-01", f"w{worker}-{commits}")
+            commits += 1
+        except Exception as exc:
+            errors += 1
+            print(f"writer {worker}: {exc}", file=sys.stderr)
+    out.put({"role": "writer", "commits": commits, "errors": errors,
+             "retries": db.pool_stats()["write_retries"]})
+
+
+def reader(data_dir, worker, deadline, out):
+    _setup(data_dir)
+    import db
+
+    latencies = []
+    errors = 0
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            with db.connection() as conn:
+                conn.execute("SELECT COUNT(*) FROM group_members").fetchone()
+                conn.execute(
+                    "SELECT dog_a_id, dog_b_id FROM relationships WHERE status='friend'"
+                ).fetchall()
+        except Exception as exc:
+            errors += 1
+            print(f"reader {worker}: {exc}", file=sys.stderr)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    out.put({
+        "role": "reader",
+        "reads": len(latencies),
+        "errors": errors,
+        "p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+        "max_ms": latencies[-1] if latencies else 0.0,
+    })
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--max-read-ms", type=float, default=250.0)
+    args = ap.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="dogs_stress_")
+    seed(data_dir)
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    deadline = time.time() + args.seconds + 2.0  # leave time for spawned children to start
+    procs = [ctx.Process(target=writer, args=(data_dir, i, deadline, out)) for i in range(args.writers)]
+    procs += [ctx.Process(target=reader, args=(data_dir, i, deadline, out)) for i in range(args.readers)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    readers = [r for r in results if r["role"] == "reader"]
+    writers = [r for r in results if r["role"] == "writer"]
+    summary = {
+        "data_dir": data_dir,
+        "commits": sum(w["commits"] for w in writers),
+        "write_errors": sum(w["errors"] for w in writers),
+        "write_retries": sum(w["retries"] for w in writers),
+        "reads": sum(r["reads"] for r in readers),
+        "read_errors": sum(r["errors"] for r in readers),
+        "read_p99_ms": max((r["p99_ms"] for r in readers), default=0.0),
+        "read_max_ms": max((r["max_ms"] for r in readers), default=0.0),
+    }
+    print(json.dumps(summary, indent=2))
+    ok = (
+        summary["write_errors"] == 0
+        and summary["read_errors"] == 0
+        and summary["read_max_ms"] <= args.max_read_ms
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import re
+
+SLOT_RE = re.compile(
+    r"^\s*(\d{1,2}):(\d{2})\s*([AP]M)\s*-\s*(\d{1,2}):(\d{2})\s*([AP]M)\s*$", re.IGNORECASE
+)
+
+
+def to_minutes(hour, minute, ampm):
+    """Minutes since midnight for a 12-hour clock time."""
+    hour = int(hour) % 12
+    if str(ampm).upper() == "PM":
+        hour += 12
+    return hour * 60 + int(minute)
+
+
+def format_time(minutes):
+    hour, minute = divmod(int(minutes), 60)
+    ampm = "PM" if hour >= 12 else "AM"
+    return f"{hour % 12 or 12}:{minute:02d} {ampm}"
+
+
+def format_slot(start_min, end_min):
+    """Slot label as built by the Today page, e.g. ``9:00 AM - 12:00 PM``."""
+    return f"{format_time(start_min)} - {format_time(end_min)}"
+
+
+def parse_slot(label):
+    """(start_min, end_min) for a slot label, or None if it is free text."""
+    m = SLOT_RE.match(str(label))
+    if not m:
+        return None
+    sh, sm, sap, eh, em, eap = m.groups()
+    return to_minutes(sh, sm, sap), to_minutes(eh, em, eap)
+
+
+def slot_sort_key(label):
+    parsed = parse_slot(label)
+    return (0, parsed, "") if parsed else (1, (0, 0), str(label))
+
+
+def slot_key(label):
+    """(label, start_min, end_min) as stored in the slots table.
+
+    Parseable labels are rewritten in the canonical ``format_slot`` spelling;
+    free-text labels are kept as typed with no times.
+    """
+    parsed = parse_slot(label)
+    if parsed is None:
+        return str(label).strip(), None, None
+    return format_slot(*parsed), parsed[0], parsed[1]
+
+
+def slot_ids(conn, pairs):
+    """Map (date, label) pairs to slot IDs, inserting slots that are missing.
+
+    Runs on the caller's connection so it joins the caller's transaction.
+    """
+    keys = {(day, label): (day,) + slot_key(label) for day, label in pairs}
+    conn.executemany(
+        "INSERT OR IGNORE INTO slots(date, label, start_min, end_min) VALUES(?,?,?,?)",
+        set(keys.values()),
+    )
+    ids = {}
+    for pair, (day, label, _, _) in keys.items():
+        ids[pair] = conn.execute(
+            "SELECT id FROM slots WHERE date=? AND label=?", (day, label)
+        ).fetchone()[0]
+    return ids
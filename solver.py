@@ -0,0 +1,383 @@
+import time
+
+import numpy as np
+
+from relationships import FRIEND, UNKNOWN
+
+# check the clock every this many search nodes
+CLOCK_EVERY = 512
+
+# in exact mode, the clique seed may use at most this share of the time budget
+CLIQUE_SEED_SHARE = 0.5
+
+# compatibility_score weights, indexed by relationship code (unknown, friend, foe)
+PAIR_SCORES = np.array([1, 2, -999], dtype=np.int64)
+
+
+def to_bits(row):
+    """Pack a boolean vector into a Python int, bit i set when row[i] is true."""
+    return int.from_bytes(np.packbits(row, bitorder="little").tobytes(), "little")
+
+
+def from_bits(bits):
+    out = []
+    while bits:
+        low = bits & -bits
+        out.append(low.bit_length() - 1)
+        bits ^= low
+    return out
+
+
+def score_partition(groups, leftovers, codes):
+    """Quality of a partition: (leftovers, friend pairs, groups needing intro)."""
+    friends = needs_intro = 0
+    for grp in groups:
+        sub = codes[np.ix_(grp, grp)]
+        friends += int(np.triu(sub == FRIEND, k=1).sum())
+        needs_intro += int((sub == UNKNOWN).any())
+    return len(leftovers), friends, needs_intro
+
+
+def partition_key(score):
+    """Sort key for score_partition results; smaller is better."""
+    leftovers, friends, needs_intro = score
+    return leftovers, -friends, needs_intro
+
+
+def constrained_order(allowed):
+    """Positions ordered most-constrained first (fewest allowed partners)."""
+    off_diag = allowed & ~np.eye(len(allowed), dtype=bool)
+    return sorted(range(len(allowed)), key=lambda i: (int(off_diag[i].sum()), i))
+
+
+def greedy_partition(allowed, codes, target_size, order=None, rng=None, tie_break=None):
+    """Greedy grouping over matrix positions.
+
+    Each group is seeded with the next remaining position in ``order`` and grown
+    with the allowed candidate that has the best ``PAIR_SCORES`` total against
+    the group so far. Ties between equally scored candidates go to the
+    highest ``tie_break`` total against the group when that non-negative
+    integer matrix is given (e.g. co-play counts), then at random with
+    ``rng``, then to the lowest position. Returns (groups, leftovers) as
+    lists of positions.
+    """
+    n = len(allowed)
+    order = range(n) if order is None else order
+    pair_score = PAIR_SCORES[codes]
+    remaining = np.ones(n, dtype=bool)
+    groups, leftovers = [], []
+
+    for seed in order:
+        if not remaining[seed]:
+            continue
+        remaining[seed] = False
+        group = [seed]
+        ok = allowed[seed] & remaining
+        score = pair_score[seed].copy()
+        tie = None if tie_break is None else tie_break[seed].astype(np.int64)
+
+        while len(group) < target_size:
+            cand = ok & remaining
+            if not cand.any():
+                break
+            ranked = np.where(cand, score, np.iinfo(np.int64).min).astype(np.float64)
+            # scores are integers, so anything in [0, 1) only reorders ties:
+            # (tie + noise) / (max tie + 1) ranks by tie first, noise second
+            scale = 1.0 if tie is None else float(tie.max() + 1)
+            if tie is not None:
+                ranked += tie / scale
+            if rng is not None:
+                ranked += rng.random(n) / scale
+            best = int(np.argmax(ranked))
+            group.append(best)
+            remaining[best] = False
+            ok &= allowed[best]
+            score += pair_score[best]
+            if tie is not None:
+                tie += tie_break[best]
+
+        if len(group) > 1:
+            groups.append(group)
+        else:
+            leftovers.extend(group)
+    return groups, leftovers
+
+
+def repair_partition(groups, free, allowed, codes, target_size):
+    """Place ``free`` positions into existing ``groups`` without disturbing them.
+
+    Free dogs are taken most-constrained first and each joins the group with
+    room and the best ``PAIR_SCORES`` total that it is allowed with; whoever
+    is left is grouped among themselves with ``greedy_partition`` and those
+    groups are appended. Returns (groups, leftovers, placed) where ``placed``
+    maps an input group index to the positions that joined it.
+    """
+    groups = [list(grp) for grp in groups]
+    free = list(free)
+    placed = {}
+    unplaced = []
+    # only groups with room are ever candidates; full ones drop out for good
+    open_groups = [i for i, members in enumerate(groups) if len(members) < target_size]
+    constraint = allowed[np.ix_(free, free)].sum(axis=1) if free else []
+    for p in [free[k] for k in np.argsort(constraint, kind="stable")]:
+        best, best_score = None, None
+        for i in open_groups:
+            members = groups[i]
+            if not allowed[p, members].all():
+                continue
+            score = int(PAIR_SCORES[codes[p, members]].sum())
+            if best is None or score > best_score:
+                best, best_score = i, score
+        if best is None:
+            unplaced.append(p)
+        else:
+            groups[best].append(p)
+            placed.setdefault(best, []).append(p)
+            if len(groups[best]) >= target_size:
+                open_groups.remove(best)
+
+    leftovers = []
+    if unplaced:
+        sub = np.ix_(unplaced, unplaced)
+        sub_groups, sub_left = greedy_partition(allowed[sub], codes[sub], target_size)
+        groups.extend([unplaced[p] for p in grp] for grp in sub_groups)
+        leftovers = [unplaced[p] for p in sub_left]
+    return groups, leftovers, placed
+
+
+def branch_and_bound(allowed, codes, target_size, time_budget=2.0, initial=None):
+    """Partition positions into compatible groups of at most ``target_size``.
+
+    Minimizes leftovers (dogs not in a group of two or more), then maximizes
+    friend pairs inside groups. Dogs are branched on most-constrained first;
+    each either joins an open group it is allowed with or opens a new one.
+    Branches are pruned when singleton groups that can no longer grow already
+    exceed the best leftover count, or when an optimistic friend-pair bound
+    cannot beat the incumbent.
+
+    ``initial`` is an optional (groups, leftovers) incumbent, e.g. the greedy
+    result. Returns (groups, leftovers, info); when ``time_budget`` runs out
+    the best partition found so far is returned with ``info["optimal"]`` False.
+    """
+    n = len(allowed)
+    deadline = time.perf_counter() + time_budget
+    if n == 0:
+        return [], [], {"nodes": 0, "optimal": True, "elapsed": 0.0}
+
+    eye = np.eye(n, dtype=bool)
+    allow_bits = [to_bits(row) for row in (allowed & ~eye)]
+    friend_bits = [to_bits(row) for row in ((codes == FRIEND) & ~eye)]
+    order = constrained_order(allowed)
+    friend_cap = [min(target_size - 1, bin(friend_bits[d]).count("1")) for d in order]
+    friend_rest = np.concatenate([np.cumsum(friend_cap[::-1])[::-1], [0]]).tolist()
+
+    if initial is None:
+        best_groups, best_left = [], list(range(n))
+    else:
+        best_groups, best_left = initial
+    best_leftovers, best_friends, _ = score_partition(best_groups, best_left, codes)
+
+    members, compat, sizes = [], [], []
+    unassigned = (1 << n) - 1
+    friends = 0
+    nodes = 0
+    timed_out = False
+
+    def options_for(d):
+        bit = 1 << d
+        joins = [
+            (bin(friend_bits[d] & members[g]).count("1"), g)
+            for g in range(len(members))
+            if sizes[g] < target_size and compat[g] & bit
+        ]
+        joins.sort(key=lambda item: -item[0])
+        return joins + [(0, None)]
+
+    # each frame: [depth, options, next option index, applied undo record or None]
+    frames = [[0, options_for(order[0]), 0, None]]
+    while frames:
+        frame = frames[-1]
+        depth, options = frame[0], frame[1]
+        d = order[depth]
+        bit = 1 << d
+
+        if frame[3] is not None:
+            g, old_compat, gain = frame[3]
+            if g is None:
+                members.pop()
+                compat.pop()
+                sizes.pop()
+            else:
+                members[g] ^= bit
+                compat[g] = old_compat
+                sizes[g] -= 1
+            friends -= gain
+            unassigned |= bit
+            frame[3] = None
+
+        nodes += 1
+        if nodes % CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+            timed_out = True
+            break
+        if frame[2] >= len(options):
+            frames.pop()
+            continue
+        gain, g = options[frame[2]]
+        frame[2] += 1
+
+        unassigned &= ~bit
+        friends += gain
+        if g is None:
+            members.append(bit)
+            compat.append(allow_bits[d])
+            sizes.append(1)
+            frame[3] = (None, None, gain)
+        else:
+            frame[3] = (g, compat[g], gain)
+            members[g] |= bit
+            compat[g] &= allow_bits[d]
+            sizes[g] += 1
+
+        stuck = sum(1 for g2 in range(len(members)) if sizes[g2] == 1 and not compat[g2] & unassigned)
+        if depth + 1 == n:
+            if (stuck, -friends) < (best_leftovers, -best_friends):
+                best_leftovers, best_friends = stuck, friends
+                best_groups = [from_bits(m) for m, s in zip(members, sizes) if s > 1]
+                best_left = [from_bits(m)[0] for m, s in zip(members, sizes) if s == 1]
+            continue
+        if stuck > best_leftovers:
+            continue
+        if stuck == best_leftovers and friends + friend_rest[depth + 1] <= best_friends:
+            continue
+        frames.append([depth + 1, options_for(order[depth + 1]), 0, None])
+
+    info = {
+        "nodes": nodes,
+        "optimal": not timed_out,
+        "elapsed": time.perf_counter() - (deadline - time_budget),
+    }
+    return best_groups, best_left, info
+
+
+# problem data shared with pool workers, set once per worker by _init_worker
+_worker_problem = None
+
+
+def _init_worker(allowed, codes, target_size, tie_break=None):
+    global _worker_problem
+    _worker_problem = (allowed, codes, target_size, tie_break)
+
+
+def _run_restart(index, seed_seq):
+    allowed, codes, target_size, tie_break = _worker_problem
+    rng = np.random.default_rng(seed_seq)
+    groups, leftovers = greedy_partition(
+        allowed, codes, target_size,
+        order=rng.permutation(len(allowed)).tolist(), rng=rng, tie_break=tie_break,
+    )
+    key = partition_key(score_partition(groups, leftovers, codes))
+    return key, index, groups, leftovers
+
+
+def best_of_restarts(
+    allowed, codes, target_size, restarts=64, workers=1, time_budget=2.0, seed=0, tie_break=None
+):
+    """Run randomized greedy restarts and keep the best-scoring partition.
+
+    Restart ``i`` always uses the ``i``-th child of ``SeedSequence(seed)``, and
+    ties are broken by restart index, so the result depends only on ``seed``
+    and ``restarts``, not on worker count or completion order, as long as all
+    restarts finish within ``time_budget``. With ``workers > 1`` restarts run
+    in a process pool whose workers receive the problem arrays once, through
+    the pool initializer, instead of with every task.
+
+    ``tie_break`` is passed on to ``greedy_partition``. Returns (groups,
+    leftovers, info) with ``info["completed"]`` restarts.
+    """
+    start = time.perf_counter()
+    seeds = np.random.SeedSequence(seed).spawn(restarts)
+    results = []
+    if workers <= 1:
+        _init_worker(allowed, codes, target_size, tie_break)
+        for i, seed_seq in enumerate(seeds):
+            if results and time.perf_counter() - start > time_budget:
+                break
+            results.append(_run_restart(i, seed_seq))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, wait
+
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(allowed, codes, target_size, tie_break)
+        )
+        try:
+            futures = [pool.submit(_run_restart, i, s) for i, s in enumerate(seeds)]
+            done, _ = wait(futures, timeout=max(0.0, time_budget - (time.perf_counter() - start)))
+            results = [f.result() for f in done]
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if not results:
+            # nothing came back in time; fall back to one restart in-process
+            _init_worker(allowed, codes, target_size, tie_break)
+            results.append(_run_restart(0, seeds[0]))
+
+    key, index, groups, leftovers = min(results, key=lambda r: (r[0], r[1]))
+    info = {
+        "completed": len(results),
+        "best_restart": index,
+        "score": key,
+        "elapsed": time.perf_counter() - start,
+    }
+    return groups, leftovers, info
+
+
+SOLVER_MODES = ("greedy", "exact", "multistart", "clique")
+
+
+def solve(
+    allowed, codes, target_size, mode="greedy", time_budget=2.0, restarts=64, workers=1, seed=0,
+    tie_break=None,
+):
+    """Partition positions with one of ``SOLVER_MODES``; returns (groups, leftovers).
+
+    ``"greedy"`` is a single ``greedy_partition`` pass. ``"clique"`` assembles
+    groups from precomputed compatible cliques (see ``cliques``) within
+    ``time_budget`` and keeps the greedy pass instead when that scores
+    better or the cliques run out of time. ``"exact"`` runs
+    ``branch_and_bound`` from the best of two greedy orders and the clique
+    cover, all within ``time_budget``: the cover may take
+    ``CLIQUE_SEED_SHARE`` of it and the search gets what is left.
+    ``"multistart"`` is ``best_of_restarts``.
+    """
+    if mode not in SOLVER_MODES:
+        raise ValueError(f"Unknown grouping mode: {mode}")
+    if mode == "greedy":
+        return greedy_partition(allowed, codes, target_size, tie_break=tie_break)
+    if mode in ("clique", "exact"):
+        # cliques builds on this module, so it comes in on first use
+        from cliques import clique_partition
+
+        start = time.perf_counter()
+        candidates = [greedy_partition(allowed, codes, target_size, tie_break=tie_break)]
+        share = CLIQUE_SEED_SHARE if mode == "exact" else 1.0
+        groups, leftovers, info = clique_partition(
+            allowed, codes, target_size, tie_break=tie_break, deadline=start + time_budget * share
+        )
+        if not info["timed_out"]:
+            candidates.append((groups, leftovers))
+        if mode == "exact":
+            candidates.append(greedy_partition(
+                allowed, codes, target_size, order=constrained_order(allowed), tie_break=tie_break
+            ))
+        best = min(candidates, key=lambda c: partition_key(score_partition(c[0], c[1], codes)))
+        if mode == "clique":
+            return best
+        remaining = max(time_budget - (time.perf_counter() - start), 0.0)
+        groups, leftovers, _ = branch_and_bound(
+            allowed, codes, target_size, time_budget=remaining, initial=best
+        )
+        return groups, leftovers
+    groups, leftovers, _ = best_of_restarts(
+        allowed, codes, target_size,
+        restarts=restarts, workers=workers, time_budget=time_budget, seed=seed, tie_break=tie_break,
+    )
+    return groups, leftovers
@@ -0,0 +1,107 @@
+"""Startup phase timings and background cache warm-up.
+
+``STARTED`` is taken when this module is first imported, which the
+launcher does before anything heavy. Each ``mark`` is printed (into
+launch.log under the launcher) and appended as a JSON line to
+``LOG_DIR/startup.jsonl`` with its offset from ``STARTED``; ``first_render``
+marks the end of the first script run, i.e. time-to-first-render.
+
+In fast mode (``DOG_PLAYGROUPS_STARTUP=fast``, the launcher's default)
+``warm_in_background`` runs ``init_db``, the heavy imports and the first
+shared-cache fills on a daemon thread while Streamlit itself is still
+importing, so the first page finds them done.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+STARTED = time.perf_counter()
+
+from config import LOG_DIR  # noqa: E402
+
+LOG_FILE = Path(LOG_DIR) / "startup.jsonl"
+MODES = ("fast", "plain")
+
+_lock = threading.Lock()
+_rendered = False
+_warm_thread = None
+
+
+def mode():
+    value = os.environ.get("DOG_PLAYGROUPS_STARTUP", "plain")
+    return value if value in MODES else "plain"
+
+
+def mark(phase, seconds=None):
+    """Record that ``phase`` finished now, taking ``seconds`` if timed."""
+    record = {
+        "pid": os.getpid(),
+        "phase": phase,
+        "at_ms": round((time.perf_counter() - STARTED) * 1000, 1),
+        "mode": mode(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    line = f"startup: {phase} at {record['at_ms']:.0f} ms"
+    if seconds is not None:
+        record["ms"] = round(seconds * 1000, 1)
+        line += f" (took {record['ms']:.0f} ms)"
+    print(line)
+    try:
+        with _lock:
+            LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def phase(name):
+    start = time.perf_counter()
+    yield
+    mark(name, time.perf_counter() - start)
+
+
+def first_render():
+    """Mark time-to-first-render; only the first call in a process counts."""
+    global _rendered
+    with _lock:
+        if _rendered:
+            return
+        _rendered = True
+    mark("first_render")
+
+
+def _warm():
+    try:
+        with phase("warm.init_db"):
+            from db import init_db
+
+            init_db()
+        with phase("warm.imports"):
+            import numpy  # noqa: F401
+            import pandas  # noqa: F401
+
+            import grouping  # noqa: F401
+        with phase("warm.roster"):
+            from roster import get_roster
+
+            roster = get_roster()
+        with phase("warm.relationships"):
+            from relationships import get_unknown_pairs
+
+            get_unknown_pairs(roster.ids)
+    except Exception as exc:  # warming is an optimization; the page will load it itself
+        print(f"startup: warm-up failed: {exc!r}")
+
+
+def warm_in_background():
+    """Start the warm-up thread once, in fast mode only."""
+    global _warm_thread
+    if mode() != "fast" or _warm_thread is not None:
+        return
+    _warm_thread = threading.Thread(target=_warm, name="startup-warm", daemon=True)
+    _warm_thread.start()